@@ -1,46 +1,393 @@
+import asyncio
+import cProfile
+import hashlib
 import json
+import multiprocessing
 import os
+import pstats
 import re
 import shutil
 import tempfile
 import threading
 import time
 import uuid
-from datetime import datetime, timedelta
+import zipfile
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 
 import emoji
 import librosa
-import moviepy as mp
 import numpy as np
 import torch
 import whisper
 import yt_dlp
-from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from textblob import TextBlob  # noqa: F401  # retained for potential future use
-from transformers import AutoModel, AutoTokenizer, pipeline  # noqa: F401  # allow extension
+
+import batching
+import captions
+import clip_render
+import ffmpeg_render
+import inference
+import jobstore
+import metrics
+import slots
+import storage
+import transcription
+import uploads
 
 
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 
+# Whisper expects 16 kHz mono input; the feature extraction shares the same buffer
+AUDIO_SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+# "whisper" (openai-whisper) or "faster-whisper" (CTranslate2, int8, VAD), and the
+# model size both use; base balances accuracy and resource usage
+TRANSCRIBE_BACKEND = os.environ.get("CLIPPER_TRANSCRIBE_BACKEND", "whisper")
+WHISPER_MODEL = os.environ.get("CLIPPER_WHISPER_MODEL", "base")
+
+# Long inputs are transcribed as parallel chunks of 5-10 minutes
+LONG_INPUT_SECONDS = float(os.environ.get("CLIPPER_LONG_INPUT_SECONDS", "900"))
+TRANSCRIBE_WORKERS = max(1, int(os.environ.get("CLIPPER_TRANSCRIBE_WORKERS", "2")))
+
+# Score added per distinct keyword / hook pattern found in a window
+TERM_WEIGHTS = {"keyword": 1.0, "hook": 3.0}
+
+YOUTUBE_URL_RE = re.compile(
+    r"(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/"
+    r"(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})"
+)
+
+RENDER_ENGINES = ("moviepy", "ffmpeg")
+# "vertical" renders 1080x1920 social clips; "fast" stream-copies raw cuts for editing
+OUTPUT_MODES = ("vertical", "fast")
+FAST_CUT_MAX_SNAP_SECONDS = 2.0
+
+YOUTUBE_VIDEO_FORMAT = "best[height<=720][ext=mp4]/best[ext=mp4]/best"
+# "full" downloads the whole video up front; "ranged" fetches audio for analysis,
+# then video only around the chosen clips, falling back to the full video if a
+# range download fails
+YOUTUBE_FETCH_MODE = os.environ.get("CLIPPER_YOUTUBE_FETCH_MODE", "full")
+YOUTUBE_RANGE_PADDING_SECONDS = 2.0
+
+# Frame hop used for the frame-level audio features (32 ms at 16 kHz)
+AUDIO_HOP_LENGTH = 512
+
+# Load the models when the clipper is created (before server.py forks, so the
+# workers share them); "0" defers loading to first use, e.g. for benchmarks.
+# Never preloaded in render or transcription workers, which re-import this file
+# as __mp_main__ when it is run as a script.
+PRELOAD_MODELS = (
+    os.environ.get("CLIPPER_PRELOAD_MODELS", "1") != "0" and __name__ != "__mp_main__"
+)
+
+# Upper bound on clips per job, and the gap kept between the chosen clips
+MAX_CLIPS = max(1, int(os.environ.get("CLIPPER_MAX_CLIPS", "5")))
+MIN_CLIP_SPACING_SECONDS = float(os.environ.get("CLIPPER_MIN_CLIP_SPACING_SECONDS", "0"))
+
+
+def select_moments(windows: List[Dict], k: int, min_spacing: float = 0.0) -> List[Dict]:
+    """Pick at most ``k`` windows with the highest total ``virality_score`` and no overlap.
+
+    Weighted interval scheduling: windows are sorted by end time and ``prior[i]``
+    counts the windows that finish at least ``min_spacing`` before window ``i``
+    starts (one binary search each). ``best[c][i]``, the best total using ``c``
+    clips among the first ``i`` windows, is a running maximum over
+    ``best[c - 1][prior] + score``, so each of the ``k`` layers is one vectorized
+    pass: O(n log n + nk) overall. Slots the optimum leaves empty (it gains
+    nothing from zero-score windows) are filled greedily by score. The chosen
+    windows come back best first.
+    """
+    if not windows or k <= 0:
+        return []
+    ordered = sorted(windows, key=lambda w: w["end"])
+    ends = np.array([w["end"] for w in ordered])
+    starts = np.array([w["start"] for w in ordered])
+    scores = np.array([w["virality_score"] for w in ordered], dtype=np.float64)
+    prior = np.searchsorted(ends, starts - min_spacing, side="right")
+
+    best = [np.zeros(len(ordered) + 1)]
+    for _ in range(min(k, len(ordered))):
+        taken = best[-1][prior] + scores
+        best.append(np.maximum.accumulate(np.concatenate(([0.0], taken))))
+
+    chosen: List[Dict] = []
+    c, i = len(best) - 1, len(ordered)
+    while c > 0 and i > 0:
+        if best[c][i] == best[c][i - 1]:
+            i -= 1
+        else:
+            chosen.append(ordered[i - 1])
+            i = prior[i - 1]
+            c -= 1
+
+    # A window that doesn't raise the total (e.g. a zero score) is never taken,
+    # so fill the remaining slots with the best windows that still fit
+    taken = {id(w) for w in chosen}
+    for window in sorted(ordered, key=lambda w: w["virality_score"], reverse=True):
+        if len(chosen) >= k:
+            break
+        if id(window) not in taken and all(
+            window["end"] <= other["start"] - min_spacing
+            or other["end"] <= window["start"] - min_spacing
+            for other in chosen
+        ):
+            chosen.append(window)
+    chosen.sort(key=lambda w: w["virality_score"], reverse=True)
+    return chosen
+
+
+class AudioFeatureTrack:
+    """Frame-level loudness, brightness and onset arrays on a uniform time grid.
+
+    Cumulative sums are kept alongside the frames so the statistics of any
+    ``(start, end)`` range are available in O(1), without touching the frames.
+    """
+
+    def __init__(
+        self,
+        rms: np.ndarray,
+        spectral_centroid: np.ndarray,
+        onset_strength: np.ndarray,
+        hop_seconds: float,
+    ) -> None:
+        n_frames = min(len(rms), len(spectral_centroid), len(onset_strength))
+        self.hop_seconds = hop_seconds
+        self.rms = np.asarray(rms[:n_frames], dtype=np.float32)
+        self.spectral_centroid = np.asarray(spectral_centroid[:n_frames], dtype=np.float32)
+        self.onset_strength = np.asarray(onset_strength[:n_frames], dtype=np.float32)
+        self._cumsums = {
+            "rms": self._cumsum(self.rms),
+            "rms_sq": self._cumsum(np.square(self.rms, dtype=np.float64)),
+            "spectral_centroid": self._cumsum(self.spectral_centroid),
+            "onset_strength": self._cumsum(self.onset_strength),
+        }
+        self._global_stats = self.window_stats(0.0, self.duration)
+
+    @staticmethod
+    def _cumsum(values: np.ndarray) -> np.ndarray:
+        return np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+    def __len__(self) -> int:
+        return len(self.rms)
+
+    @property
+    def times(self) -> np.ndarray:
+        """Centre time of each frame in seconds."""
+        return np.arange(len(self), dtype=np.float32) * self.hop_seconds
+
+    @property
+    def duration(self) -> float:
+        return len(self) * self.hop_seconds
+
+    @property
+    def global_stats(self) -> Dict[str, float]:
+        return self._global_stats
+
+    def _frame_range(self, start: float, end: float) -> Tuple[int, int]:
+        # Frames sit on a uniform grid, so the index is plain arithmetic
+        first = min(max(int(np.ceil(start / self.hop_seconds)), 0), len(self) - 1)
+        last = min(max(int(end / self.hop_seconds) + 1, first + 1), len(self))
+        return first, last
+
+    def window_stats(self, start: float, end: float) -> Dict[str, float]:
+        """Mean/std loudness plus mean brightness and onset strength over a time range."""
+        if not len(self):
+            return {"rms_mean": 0.0, "rms_std": 0.0, "centroid_mean": 0.0, "onset_mean": 0.0}
+        first, last = self._frame_range(start, end)
+        count = last - first
+
+        def mean(name: str) -> float:
+            values = self._cumsums[name]
+            return float((values[last] - values[first]) / count)
+
+        rms_mean = mean("rms")
+        rms_var = max(mean("rms_sq") - rms_mean * rms_mean, 0.0)
+        return {
+            "rms_mean": rms_mean,
+            "rms_std": float(np.sqrt(rms_var)),
+            "centroid_mean": mean("spectral_centroid"),
+            "onset_mean": mean("onset_strength"),
+        }
+
+
+class KeywordMatcher:
+    r"""Finds every viral keyword and hook pattern in a text in one regex pass each.
+
+    Keywords are matched literally and hooks as regexes, both as whole words
+    and ignoring case. Hook patterns are compiled exactly as
+    written, since lowercasing a regex changes it (``\S`` is not ``\s``).
+    Every alternative sits in a named group inside a lookahead, so overlapping
+    hits (``secret`` inside ``the secret``) are all reported.
+    """
+
+    def __init__(self, keywords: List[str], hook_patterns: List[str]) -> None:
+        self.keywords = list(keywords)
+        self.hook_patterns = list(hook_patterns)
+        self._terms: Dict[str, Tuple[str, str]] = {}
+        self._regexes = [
+            self._compile("keyword", [re.escape(k) for k in self.keywords], self.keywords),
+            self._compile("hook", self.hook_patterns, self.hook_patterns),
+        ]
+
+    def _compile(self, kind: str, patterns: List[str], terms: List[str]) -> re.Pattern | None:
+        if not patterns:
+            return None
+        alternatives = []
+        # Longest first, so a longer phrase wins over its prefix at the same position
+        for idx in sorted(range(len(patterns)), key=lambda i: -len(patterns[i])):
+            group = f"{kind[0]}{idx}"
+            self._terms[group] = (kind, terms[idx])
+            alternatives.append(f"(?P<{group}>{patterns[idx]})")
+        # Not inside a word on either side; unlike \b this also works for patterns
+        # that start or end with punctuation
+        return re.compile(rf"(?=(?<!\w)(?:{'|'.join(alternatives)})(?!\w))", re.IGNORECASE)
+
+    def find_all(self, text_lower: str) -> List[Tuple[int, int, Tuple[str, str]]]:
+        """``(start, end, (kind, term))`` for every hit, ordered by start."""
+        matches = []
+        for regex in self._regexes:
+            if regex is None:
+                continue
+            for match in regex.finditer(text_lower):
+                start, end = match.span(match.lastgroup)
+                matches.append((start, end, self._terms[match.lastgroup]))
+        matches.sort(key=lambda item: item[0])
+        return matches
+
+
+class AnalysisCache:
+    """Disk cache of transcripts and audio features keyed by source identity.
+
+    Each entry is a single compressed ``.npz`` file holding the frame-level
+    audio track plus the transcript and summary scalars as JSON. Hits refresh
+    the file's mtime, and the oldest entries are evicted once the cache grows
+    past ``max_bytes``.
+    """
+
+    # Bump when the stored layout or the analysis it captures changes
+    VERSION = "1"
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(f"{self.VERSION}|{key}".encode("utf-8")).hexdigest()
+        return self.root / f"{digest}.npz"
+
+    def get(self, key: str) -> Tuple[List[Dict], Dict] | None:
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                payload = json.loads(data["meta"].tobytes().decode("utf-8"))
+                audio_features = dict(payload["summary"])
+                if "rms" in data.files:
+                    audio_features["track"] = AudioFeatureTrack(
+                        data["rms"],
+                        data["spectral_centroid"],
+                        data["onset_strength"],
+                        float(data["hop_seconds"]),
+                    )
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            path.unlink(missing_ok=True)
+            return None
+        return payload["segments"], audio_features
+
+    def put(self, key: str, segments: List[Dict], audio_features: Dict) -> None:
+        summary = {name: value for name, value in audio_features.items() if name != "track"}
+        meta = json.dumps({"segments": segments, "summary": summary}, default=float)
+        arrays = {"meta": np.frombuffer(meta.encode("utf-8"), dtype=np.uint8)}
+        track: AudioFeatureTrack | None = audio_features.get("track")
+        if track is not None:
+            arrays.update(
+                rms=track.rms,
+                spectral_centroid=track.spectral_centroid,
+                onset_strength=track.onset_strength,
+                hop_seconds=np.array(track.hop_seconds),
+            )
+
+        path = self._path(key)
+        temp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp")
+        try:
+            with temp_path.open("wb") as handle:
+                np.savez_compressed(handle, **arrays)
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in self.root.glob("*.npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries, key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= size
+
 
 class AIVideoClipper:
     """Utility that finds high-impact segments from long-form video content."""
 
-    def __init__(self) -> None:
-        print("Loading models...")
-        # Use base model to balance accuracy and resource usage
-        self.whisper_model = whisper.load_model("base")
-        self.sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-        )
-        self.emotion_analyzer = pipeline(
-            "text-classification",
-            model="j-hartmann/emotion-english-distilroberta-base",
+    def __init__(
+        self,
+        whisper_model=None,
+        sentiment_analyzer=None,
+        emotion_analyzer=None,
+        preload_models: bool | None = None,
+    ) -> None:
+        """Models passed in are used as given (benchmarks pass stubs); the others
+        are loaded now, or on first use when ``preload_models`` is false."""
+        self.whisper_model_name = WHISPER_MODEL
+        self.inference_precision = os.environ.get("CLIPPER_INFERENCE_PRECISION", "fp32")
+        if whisper_model is not None:
+            self.transcriber = transcription.WhisperBackend(
+                self.whisper_model_name, model=whisper_model
+            )
+        else:
+            # server.py builds this in the parent while it is kept single-threaded,
+            # and exports each worker's budget; faster-whisper fixes its thread
+            # count when the model is created, so it takes the budget up front
+            threads = int(os.environ.get("CLIPPER_TORCH_THREADS", "0")) or torch.get_num_threads()
+            self.transcriber = transcription.create_backend(
+                TRANSCRIBE_BACKEND, self.whisper_model_name, threads
+            )
+        # An injected model can't be reloaded by name in the chunked transcription workers
+        self._whisper_injected = whisper_model is not None
+        self._classifiers = None
+        if sentiment_analyzer is not None and emotion_analyzer is not None:
+            self._classifiers = (sentiment_analyzer, emotion_analyzer)
+        self._models_lock = threading.Lock()
+        # Number of window texts pushed through each classifier per forward pass
+        self.score_batch_size = max(1, int(os.environ.get("CLIPPER_SCORE_BATCH_SIZE", "16")))
+        # Texts from every job scoring at the same time share forward passes
+        self.batcher = batching.InferenceBatcher(
+            self._classify_batch,
+            max_batch_size=self.score_batch_size,
+            max_wait_seconds=float(os.environ.get("CLIPPER_BATCH_MAX_WAIT_MS", "10")) / 1000,
+            name="clipper-classifier-batcher",
         )
 
         self.viral_keywords = [
@@ -109,14 +456,115 @@ class AIVideoClipper:
             r"watch this",
             r"wait for it",
         ]
+        # Optional JSON file with "viral_keywords" / "hook_patterns" lists, picked
+        # up again whenever it changes on disk
+        self.keywords_file = os.environ.get("CLIPPER_KEYWORDS_FILE")
+        self._keywords_mtime: float | None = None
+        self._keywords_lock = threading.Lock()
+        self._matcher = KeywordMatcher(self.viral_keywords, self.hook_patterns)
+        self.reload_keywords()
+
+        if PRELOAD_MODELS if preload_models is None else preload_models:
+            self.load_models()
+
+    def load_models(self) -> None:
+        """Load every model not loaded yet."""
+        with self._models_lock:
+            print("Loading models...")
+            self.transcriber.load()
+            if self._classifiers is None:
+                self._classifiers = inference.load_text_classifiers(self.inference_precision)
+
+    @property
+    def sentiment_analyzer(self):
+        if self._classifiers is None:
+            self.load_models()
+        return self._classifiers[0]
+
+    @property
+    def emotion_analyzer(self):
+        if self._classifiers is None:
+            self.load_models()
+        return self._classifiers[1]
+
+    @property
+    def matcher(self) -> KeywordMatcher:
+        self.reload_keywords()
+        return self._matcher
+
+    def reload_keywords(self) -> bool:
+        """Rebuild the matcher if the keywords file changed; returns True when it did.
+
+        A file that fails to load or compile leaves the current matcher in place.
+        """
+        if not self.keywords_file:
+            return False
+        try:
+            mtime = os.stat(self.keywords_file).st_mtime
+        except OSError:
+            return False
+        with self._keywords_lock:
+            if mtime == self._keywords_mtime:
+                return False
+            self._keywords_mtime = mtime
+            return self._load_keywords()
+
+    def _load_keywords(self) -> bool:
+        try:
+            with open(self.keywords_file, "r", encoding="utf-8") as handle:
+                config = json.load(handle)
+            keywords = [str(k).lower() for k in config.get("viral_keywords", self.viral_keywords)]
+            hooks = [str(h) for h in config.get("hook_patterns", self.hook_patterns)]
+            matcher = KeywordMatcher(keywords, hooks)
+        except (AttributeError, OSError, TypeError, ValueError, re.error) as exc:
+            print(f"Ignoring keywords file {self.keywords_file}: {exc}")
+            return False
+
+        self.viral_keywords, self.hook_patterns = keywords, hooks
+        self._matcher = matcher
+        print(f"Loaded {len(keywords)} keywords and {len(hooks)} hook patterns")
+        return True
+
+    @property
+    def analysis_fingerprint(self) -> str:
+        """Identifies the models whose output lands in the analysis cache."""
+        return self.transcriber.fingerprint
 
     @staticmethod
     def is_valid_youtube_url(url: str) -> bool:
-        youtube_regex = re.compile(
-            r"(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/"
-            r"(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})"
-        )
-        return youtube_regex.match(url) is not None
+        return YOUTUBE_URL_RE.match(url) is not None
+
+    @staticmethod
+    def youtube_video_id(url: str) -> str | None:
+        match = YOUTUBE_URL_RE.match(url)
+        return match.group(6) if match else None
+
+    @staticmethod
+    def _youtube_metadata(info: Dict) -> Dict:
+        return {
+            "title": info.get("title", "video"),
+            "duration": info.get("duration", 0) or 0,
+            "uploader": info.get("uploader", "Unknown"),
+            "view_count": info.get("view_count", 0),
+            "upload_date": info.get("upload_date", "Unknown"),
+        }
+
+    @staticmethod
+    def _check_youtube_duration(info: Dict) -> None:
+        if (info.get("duration", 0) or 0) > 3600:
+            raise ValueError("Video too long. Please use videos shorter than 1 hour.")
+
+    def fetch_youtube_metadata(self, url: str) -> Dict:
+        """Look up a video's metadata without downloading any media."""
+        if not self.is_valid_youtube_url(url):
+            raise ValueError("Invalid YouTube URL. Please provide a valid YouTube video link.")
+        try:
+            with yt_dlp.YoutubeDL({"noplaylist": True, "quiet": True}) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as exc:  # pragma: no cover - network interaction
+            raise RuntimeError(f"Failed to look up YouTube video: {exc}") from exc
+        self._check_youtube_duration(info)
+        return self._youtube_metadata(info)
 
     def download_youtube_video(self, url: str, temp_dir: str) -> Tuple[str, Dict]:
         print(f"Downloading YouTube video: {url}")
@@ -124,7 +572,7 @@ class AIVideoClipper:
             raise ValueError("Invalid YouTube URL. Please provide a valid YouTube video link.")
 
         ydl_opts = {
-            "format": "best[height<=720][ext=mp4]/best[ext=mp4]/best",
+            "format": YOUTUBE_VIDEO_FORMAT,
             "outtmpl": os.path.join(temp_dir, "%(title)s.%(ext)s"),
             "noplaylist": True,
             "extractaudio": False,
@@ -137,9 +585,7 @@ class AIVideoClipper:
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
-                duration = info.get("duration", 0) or 0
-                if duration > 3600:
-                    raise ValueError("Video too long. Please use videos shorter than 1 hour.")
+                self._check_youtube_duration(info)
 
                 ydl.download([url])
                 video_title = info.get("title", "video")
@@ -154,13 +600,7 @@ class AIVideoClipper:
                 if downloaded_files:
                     video_path = os.path.join(temp_dir, downloaded_files[0])
 
-                metadata = {
-                    "title": video_title,
-                    "duration": duration,
-                    "uploader": info.get("uploader", "Unknown"),
-                    "view_count": info.get("view_count", 0),
-                    "upload_date": info.get("upload_date", "Unknown"),
-                }
+                metadata = self._youtube_metadata(info)
                 print(f"Successfully downloaded: {video_title}")
                 return video_path, metadata
         except Exception as exc:  # pragma: no cover - network interaction
@@ -169,276 +609,353 @@ class AIVideoClipper:
         raise RuntimeError("Unable to download YouTube video")
 
     @staticmethod
-    def extract_audio_features(video_path: str) -> Dict:
-        """Extract audio features from a video file for engagement analysis."""
-        # moviepy writes audio track into a temporary wav for librosa
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_audio:
-            temp_audio_path = tmp_audio.name
+    def _downloaded_file(temp_dir: str, stem: str) -> str:
+        matches = sorted(Path(temp_dir).glob(f"{stem}.*"))
+        if not matches:
+            raise RuntimeError(f"yt-dlp did not produce {stem}")
+        return str(matches[0])
+
+    def download_youtube_audio(self, url: str, temp_dir: str) -> str:
+        """Phase one of a ranged fetch: only the smallest audio stream, for analysis."""
+        print(f"Downloading YouTube audio: {url}")
+        ydl_opts = {
+            "format": "worstaudio/bestaudio/worst",
+            "outtmpl": os.path.join(temp_dir, "source_audio.%(ext)s"),
+            "noplaylist": True,
+            "quiet": True,
+        }
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.download([url])
+            return self._downloaded_file(temp_dir, "source_audio")
+        except Exception as exc:  # pragma: no cover - network interaction
+            raise RuntimeError(f"Failed to download YouTube audio: {exc}") from exc
+
+    def download_youtube_range(
+        self, url: str, start: float, end: float, temp_dir: str, name: str
+    ) -> Tuple[str, float]:
+        """Phase two of a ranged fetch: video for one chosen time range only.
+
+        The range is padded by ``YOUTUBE_RANGE_PADDING_SECONDS`` and cut on exact
+        timestamps. Returns the file path and the source time at which it starts.
+        """
+        range_start = max(0.0, start - YOUTUBE_RANGE_PADDING_SECONDS)
+        range_end = end + YOUTUBE_RANGE_PADDING_SECONDS
+        print(f"Downloading YouTube range: {range_start:.1f}s - {range_end:.1f}s")
+        ydl_opts = {
+            "format": YOUTUBE_VIDEO_FORMAT,
+            "outtmpl": os.path.join(temp_dir, f"{name}.%(ext)s"),
+            "noplaylist": True,
+            "quiet": True,
+            "download_ranges": yt_dlp.utils.download_range_func(None, [(range_start, range_end)]),
+            "force_keyframes_at_cuts": True,
+        }
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.download([url])
+            return self._downloaded_file(temp_dir, name), range_start
+        except Exception as exc:  # pragma: no cover - network interaction
+            raise RuntimeError(f"Failed to download YouTube clip range: {exc}") from exc
+
+    @staticmethod
+    def decode_audio(video_path: str) -> np.ndarray:
+        """Decode the audio track once into a mono 16 kHz float32 buffer.
 
+        The buffer feeds both Whisper and the librosa feature extraction, so the
+        source is only run through ffmpeg a single time per job.
+        """
         try:
-            clip = mp.VideoFileClip(video_path)
-            clip.audio.write_audiofile(temp_audio_path, fps=16000, logger=None)
-            clip.close()
-
-            y, sr = librosa.load(temp_audio_path, sr=None)
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-            energy_variance = float(np.var(librosa.feature.rms(y=y)[0]))
-        finally:
-            try:
-                os.remove(temp_audio_path)
-            except OSError:
-                pass
+            return whisper.load_audio(video_path, sr=AUDIO_SAMPLE_RATE)
+        except RuntimeError as exc:
+            raise ValueError("Could not read the audio track of this video.") from exc
+
+    @staticmethod
+    def extract_audio_features(audio: np.ndarray, sr: int = AUDIO_SAMPLE_RATE) -> Dict:
+        """Extract audio features from a decoded waveform for engagement analysis.
+
+        Besides the global summary scalars, ``track`` holds the frame-level
+        ``AudioFeatureTrack`` used for window-local scoring.
+        """
+        hop = AUDIO_HOP_LENGTH
+        # One magnitude spectrogram feeds every spectral feature below
+        magnitude = np.abs(librosa.stft(audio, hop_length=hop))
+        rms = librosa.feature.rms(S=magnitude, hop_length=hop)[0]
+        spectral_centroids = librosa.feature.spectral_centroid(S=magnitude, sr=sr)[0]
+        spectral_rolloff = librosa.feature.spectral_rolloff(S=magnitude, sr=sr)[0]
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=magnitude**2, sr=sr))
+        del magnitude
+        mfccs = librosa.feature.mfcc(S=mel_db, n_mfcc=13)
+        onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr, hop_length=hop)
+        tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop)
 
         return {
             "tempo": float(tempo),
             "spectral_centroid_mean": float(np.mean(spectral_centroids)),
             "spectral_rolloff_mean": float(np.mean(spectral_rolloff)),
             "mfcc_mean": float(np.mean(mfccs)),
-            "energy_variance": energy_variance,
+            "energy_variance": float(np.var(rms)),
+            "track": AudioFeatureTrack(rms, spectral_centroids, onset_env, hop / sr),
         }
 
-    def transcribe_video(self, video_path: str) -> List[Dict]:
+    def transcribe_video(self, audio: np.ndarray) -> List[Dict]:
+        """Transcribe a 16 kHz waveform produced by ``decode_audio``.
+
+        Inputs longer than ``CLIPPER_LONG_INPUT_SECONDS`` are split at quiet
+        points and transcribed in parallel chunks when more than one
+        transcription worker is configured.
+        """
         print("Transcribing video...")
-        result = self.whisper_model.transcribe(video_path, word_timestamps=True)
-        segments: List[Dict] = []
-        for segment in result.get("segments", []):
-            segments.append(
-                {
-                    "start": segment["start"],
-                    "end": segment["end"],
-                    "text": segment["text"].strip(),
-                    "words": segment.get("words", []),
-                }
+        if (
+            len(audio) / AUDIO_SAMPLE_RATE >= LONG_INPUT_SECONDS
+            and TRANSCRIBE_WORKERS > 1
+            and not self._whisper_injected
+        ):
+            return transcription.transcribe_chunked(
+                audio,
+                self.transcriber.name,
+                self.whisper_model_name,
+                TRANSCRIBE_WORKERS,
+                threads_per_worker=max(1, torch.get_num_threads() // TRANSCRIBE_WORKERS),
+                sr=AUDIO_SAMPLE_RATE,
             )
-        return segments
 
-    def calculate_virality_score(
-        self, text: str, audio_features: Dict, segment_duration: float
-    ) -> float:
-        score = 0.0
-        text_lower = text.lower()
+        return self.transcriber.transcribe(audio)
+
+    def _classify_batch(self, texts: List[str]) -> List[Tuple[Dict, Dict]]:
+        options = {"batch_size": len(texts), "truncation": True, "padding": True}
+        with torch.inference_mode():
+            sentiments = self.sentiment_analyzer(texts, **options)
+            emotions = self.emotion_analyzer(texts, **options)
+        return list(zip(sentiments, emotions))
+
+    def classify_texts(
+        self, texts: List[str], batch_size: int | None = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Run both classifiers over ``texts``, scoring each distinct string once.
+
+        Texts go through the shared batcher, so concurrent jobs are batched
+        together. An explicit ``batch_size`` bypasses it and runs fixed batches
+        in the calling thread. Returns the sentiment and emotion predictions
+        aligned with ``texts``.
+        """
+        # Length-sorted batches keep padding waste low inside each forward pass
+        unique_texts = sorted(set(texts), key=len)
+        if not unique_texts:
+            return [], []
+
+        if batch_size is None:
+            predictions = self.batcher.map(unique_texts)
+        else:
+            predictions = []
+            for offset in range(0, len(unique_texts), batch_size):
+                predictions += self._classify_batch(unique_texts[offset : offset + batch_size])
+        by_text = dict(zip(unique_texts, predictions))
+        return (
+            [by_text[text][0] for text in texts],
+            [by_text[text][1] for text in texts],
+        )
 
-        sentiment = self.sentiment_analyzer(text)[0]
+    @staticmethod
+    def _sentiment_bonus(sentiment: Dict) -> float:
         if sentiment["label"] == "POSITIVE" and sentiment["score"] > 0.8:
-            score += 2.0
-        elif sentiment["label"] == "NEGATIVE" and sentiment["score"] > 0.8:
-            score += 1.5
+            return 2.0
+        if sentiment["label"] == "NEGATIVE" and sentiment["score"] > 0.8:
+            return 1.5
+        return 0.0
 
-        emotion = self.emotion_analyzer(text)[0]
+    @staticmethod
+    def _emotion_bonus(emotion: Dict) -> float:
         high_engagement_emotions = {"surprise", "excitement", "anger", "joy"}
         if emotion["label"].lower() in high_engagement_emotions and emotion["score"] > 0.7:
-            score += 2.0
+            return 2.0
+        return 0.0
 
-        for keyword in self.viral_keywords:
-            if keyword in text_lower:
+    @staticmethod
+    def _audio_bonus(
+        audio_features: Dict, start: float | None = None, end: float | None = None
+    ) -> float:
+        """Reward windows that are louder and more dynamic than the video as a whole.
+
+        Without a frame-level track or a time range, fall back to the global
+        tempo/energy summary, which scores every window alike.
+        """
+        track: AudioFeatureTrack | None = audio_features.get("track")
+        if track is None or start is None or end is None or not len(track):
+            score = 0.0
+            if audio_features.get("tempo", 0) > 120:
                 score += 1.0
+            if audio_features.get("energy_variance", 0) > 0.01:
+                score += 1.0
+            return score
 
-        for pattern in self.hook_patterns:
-            if re.search(pattern, text_lower):
-                score += 3.0
-
-        if audio_features.get("tempo", 0) > 120:
+        window = track.window_stats(start, end)
+        overall = track.global_stats
+        score = 0.0
+        if window["rms_mean"] > overall["rms_mean"]:
             score += 1.0
-        if audio_features.get("energy_variance", 0) > 0.01:
+        if window["rms_std"] > overall["rms_std"]:
             score += 1.0
+        return score
 
-        if 25 <= segment_duration <= 65:
+    @staticmethod
+    def _structure_bonus(duration: float, word_count: int) -> float:
+        score = 0.0
+        if 25 <= duration <= 65:
             score += 2.0
-        elif 15 <= segment_duration <= 90:
+        elif 15 <= duration <= 90:
             score += 1.0
 
-        word_count = len(text.split())
         if 20 <= word_count <= 100:
             score += 1.0
+        return score
 
+    def calculate_virality_score(
+        self,
+        text: str,
+        audio_features: Dict,
+        segment_duration: float,
+        sentiment: Dict | None = None,
+        emotion: Dict | None = None,
+    ) -> float:
+        """Score a single block of text; ``find_best_moments`` uses the segment-level engine."""
+        with torch.inference_mode():
+            if sentiment is None:
+                sentiment = self.sentiment_analyzer(text, truncation=True)[0]
+            if emotion is None:
+                emotion = self.emotion_analyzer(text, truncation=True)[0]
+
+        score = self._sentiment_bonus(sentiment) + self._emotion_bonus(emotion)
+        for kind, _ in {term for _, _, term in self.matcher.find_all(text.lower())}:
+            score += TERM_WEIGHTS[kind]
+        score += self._audio_bonus(audio_features)
+        score += self._structure_bonus(segment_duration, len(text.split()))
         return min(score, 10.0)
 
+    @staticmethod
+    def window_bounds(segments: List[Dict], clip_duration: int) -> List[Tuple[int, int]]:
+        """Return ``(i, j)`` so that segments ``i..j-1`` form the window starting at segment ``i``.
+
+        A window grows until it reaches ``clip_duration`` or the next segment would push it
+        past 1.5x that length. Both ends only move forward, so a two-pointer sweep suffices.
+        """
+        bounds: List[Tuple[int, int]] = []
+        j = 0
+        for i, segment in enumerate(segments):
+            start = segment["start"]
+            j = max(j, i + 1)
+            while (
+                j < len(segments)
+                and segments[j - 1]["end"] - start < clip_duration
+                and segments[j]["end"] - start <= clip_duration * 1.5
+            ):
+                j += 1
+            bounds.append((i, j))
+        return bounds
+
     def find_best_moments(
-        self, segments: List[Dict], audio_features: Dict, clip_duration: int = 30
+        self,
+        segments: List[Dict],
+        audio_features: Dict,
+        clip_duration: int = 30,
+        batch_size: int | None = None,
+        num_clips: int = 5,
+        min_spacing: float = MIN_CLIP_SPACING_SECONDS,
     ) -> List[Dict]:
+        """Score every candidate window and keep the best non-overlapping ones.
+
+        The classifiers and keyword/hook matching run once per Whisper segment; each
+        window's score is then aggregated from per-segment arrays, so inference cost
+        grows linearly with transcript length rather than with window overlap. The
+        ``num_clips`` windows with the best total score are chosen by
+        ``select_moments``.
+        """
         print("Analyzing segments for viral potential...")
-        scored_segments: List[Dict] = []
-
-        for i, segment in enumerate(segments):
-            clip_segments = [segment]
-            current_duration = segment["end"] - segment["start"]
-            j = i + 1
-            while j < len(segments) and current_duration < clip_duration:
-                next_segment = segments[j]
-                if next_segment["end"] - segment["start"] <= clip_duration * 1.5:
-                    clip_segments.append(next_segment)
-                    current_duration = next_segment["end"] - segment["start"]
-                    j += 1
-                else:
-                    break
+        if not segments:
+            return []
+
+        texts = [s["text"] for s in segments]
+        sentiments, emotions = self.classify_texts(texts, batch_size)
+
+        # Word-weighted prefix sums of the per-segment model bonuses
+        word_counts = np.array([len(text.split()) for text in texts], dtype=np.float64)
+        sentiment_bonus = np.array([self._sentiment_bonus(s) for s in sentiments])
+        emotion_bonus = np.array([self._emotion_bonus(e) for e in emotions])
+        words_prefix = np.concatenate(([0.0], np.cumsum(word_counts)))
+        sentiment_prefix = np.concatenate(([0.0], np.cumsum(sentiment_bonus * word_counts)))
+        emotion_prefix = np.concatenate(([0.0], np.cumsum(emotion_bonus * word_counts)))
+
+        # One pass of the compiled matcher over the whole transcript; a window
+        # counts the hits that lie entirely inside its character span, including
+        # hooks that straddle two of its segments.
+        transcript = " ".join(text.lower() for text in texts)
+        char_starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+        char_ends = char_starts + np.array([len(text) for text in texts])
+        matches = self.matcher.find_all(transcript)
+        by_end = sorted(range(len(matches)), key=lambda m: matches[m][1])
+        active = [False] * len(matches)
+        expired = [False] * len(matches)
+
+        # Distinct terms in the current window: a hit enters once the window's
+        # end reaches past it and leaves once the window's start moves beyond it
+        term_counts: Dict[Tuple[str, str], int] = {}
+        term_score = 0.0
 
-            combined_text = " ".join(s["text"] for s in clip_segments)
-            virality_score = self.calculate_virality_score(
-                combined_text, audio_features, current_duration
-            )
+        scored_segments: List[Dict] = []
+        next_start = next_end = 0
+        for i, j in self.window_bounds(segments, clip_duration):
+            span_start, span_end = char_starts[i], char_ends[j - 1]
+            while next_start < len(matches) and matches[next_start][0] < span_start:
+                expired[next_start] = True
+                if active[next_start]:
+                    active[next_start] = False
+                    term = matches[next_start][2]
+                    term_counts[term] -= 1
+                    if term_counts[term] == 0:
+                        term_score -= TERM_WEIGHTS[term[0]]
+                next_start += 1
+            while next_end < len(by_end) and matches[by_end[next_end]][1] <= span_end:
+                m = by_end[next_end]
+                if not expired[m]:
+                    active[m] = True
+                    term = matches[m][2]
+                    term_counts[term] = term_counts.get(term, 0) + 1
+                    if term_counts[term] == 1:
+                        term_score += TERM_WEIGHTS[term[0]]
+                next_end += 1
+
+            words = words_prefix[j] - words_prefix[i]
+            start, end = segments[i]["start"], segments[j - 1]["end"]
+            duration = end - start
+            score = term_score + self._structure_bonus(duration, int(words))
+            score += self._audio_bonus(audio_features, start, end)
+            if words > 0:
+                score += (sentiment_prefix[j] - sentiment_prefix[i]) / words
+                score += (emotion_prefix[j] - emotion_prefix[i]) / words
 
             scored_segments.append(
                 {
-                    "start": segment["start"],
-                    "end": clip_segments[-1]["end"],
-                    "text": combined_text,
-                    "duration": current_duration,
-                    "virality_score": virality_score,
-                    "segments": clip_segments,
+                    "start": start,
+                    "end": end,
+                    "duration": duration,
+                    "virality_score": min(score, 10.0),
+                    "bounds": (i, j),
                 }
             )
 
-        scored_segments.sort(key=lambda x: x["virality_score"], reverse=True)
-
-        final_segments: List[Dict] = []
-        for segment in scored_segments:
-            overlap = False
-            for existing in final_segments:
-                if segment["start"] < existing["end"] and segment["end"] > existing["start"]:
-                    overlap = True
-                    break
-            if not overlap:
-                final_segments.append(segment)
-            if len(final_segments) >= 5:
-                break
-
+        final_segments = select_moments(scored_segments, num_clips, min_spacing)
+        for moment in final_segments:
+            i, j = moment.pop("bounds")
+            moment["segments"] = segments[i:j]
+            moment["text"] = " ".join(texts[i:j])
+            moment["cues"] = captions.build_cues(moment["segments"], moment["start"], moment["end"])
         return final_segments
 
     @staticmethod
     def add_emojis_to_text(text: str) -> str:
-        emoji_map = {
-            "money": "💰",
-            "rich": "💰",
-            "dollar": "💵",
-            "love": "❤️",
-            "heart": "❤️",
-            "like": "👍",
-            "fire": "🔥",
-            "hot": "🔥",
-            "amazing": "🔥",
-            "laugh": "😂",
-            "funny": "😂",
-            "lol": "😂",
-            "wow": "😱",
-            "omg": "😱",
-            "shocking": "😱",
-            "cool": "😎",
-            "awesome": "😎",
-            "great": "😎",
-            "think": "🤔",
-            "question": "❓",
-            "why": "🤔",
-            "warning": "⚠️",
-            "careful": "⚠️",
-            "danger": "⚠️",
-            "success": "✅",
-            "win": "🏆",
-            "winner": "🏆",
-            "music": "🎵",
-            "song": "🎵",
-            "sound": "🔊",
-        }
+        return captions.add_emojis(text)
 
-        words = text.lower().split()
-        for word in words:
-            clean_word = re.sub(r"[^\w]", "", word)
-            if clean_word in emoji_map:
-                text = re.sub(
-                    f"\\b{re.escape(word)}\\b",
-                    f"{word} {emoji_map[clean_word]}",
-                    text,
-                    flags=re.IGNORECASE,
-                )
-        return text
-
-    def create_clip(
-        self,
-        video_path: str,
-        start_time: float,
-        end_time: float,
-        text: str,
-        output_path: str,
-        add_subtitles: bool = True,
-    ) -> str:
-        print(f"Creating clip: {start_time:.1f}s - {end_time:.1f}s")
-        base_clip = mp.VideoFileClip(video_path)
-        segment_clip = None
-        background = None
-        video_resized = None
-        video_centered = None
-        base_composite = None
-        txt_clip = None
-        final_video = None
-        try:
-            segment_clip = base_clip.subclipped(start_time, end_time)
-
-            target_width = 1080
-            target_height = 1920
-
-            scale_w = target_width / segment_clip.w
-            scale_h = target_height / segment_clip.h
-            scale = min(scale_w, scale_h)
-            video_resized = segment_clip.resized(new_size=scale)
-
-            background = mp.ColorClip(
-                size=(target_width, target_height), color=(0, 0, 0)
-            ).with_duration(video_resized.duration)
-            video_centered = video_resized.with_position(("center", "center"))
-            base_composite = mp.CompositeVideoClip(
-                [background, video_centered], size=(target_width, target_height)
-            )
-
-            final_video = base_composite
-
-            if add_subtitles and text:
-                text_with_emojis = self.add_emojis_to_text(text)
-                txt_clip = (
-                    mp.TextClip(
-                        text=text_with_emojis,
-                        font_size=60,
-                        color="white",
-                        stroke_color="black",
-                        stroke_width=3,
-                        size=(target_width - 100, None),
-                        method="caption",
-                    )
-                    .with_position(("center", 0.8), relative=True)
-                    .with_duration(final_video.duration)
-                )
-                final_video = mp.CompositeVideoClip(
-                    [final_video, txt_clip], size=(target_width, target_height)
-                )
-
-            final_video.write_videofile(
-                output_path,
-                codec="libx264",
-                audio_codec="aac",
-                temp_audiofile="temp-audio.m4a",
-                remove_temp=True,
-                fps=30,
-                preset="ultrafast",
-            )
-        finally:
-            base_clip.close()
-            if segment_clip is not None:
-                segment_clip.close()
-            if background is not None:
-                background.close()
-            if video_resized is not None:
-                video_resized.close()
-            if video_centered is not None:
-                video_centered.close()
-            if base_composite is not None and base_composite is not final_video:
-                base_composite.close()
-            if txt_clip is not None:
-                txt_clip.close()
-            if final_video is not None:
-                final_video.close()
-
-        return output_path
+    # Lives in clip_render so render workers don't import this module
+    create_clip = staticmethod(clip_render.create_clip)
 
 
 def generate_clips(
@@ -451,12 +968,45 @@ def generate_clips(
     num_clips: int,
     add_subtitles: bool,
     output_dir: str,
+    progress: Callable[[str], None] | None = None,
+    analysis_cache: AnalysisCache | None = None,
+    render_executor: Executor | None = None,
+    render_workers: int = 1,
+    render_slots: slots.SlotPool | None = None,
+    render_engine: str = "moviepy",
+    output_mode: str = "vertical",
+    on_clip: Callable[[Dict], None] | None = None,
+    job_metrics: metrics.JobMetrics | None = None,
+    source_hash: str | None = None,
+    render_profile_dir: str | None = None,
 ) -> Tuple[str, List[Dict], Dict]:
-    """Core processing routine reused by API handlers."""
+    """Core processing routine reused by API handlers.
+
+    ``progress`` is called with the name of each pipeline stage as it starts.
+    When ``analysis_cache`` is given, transcripts and audio features are reused
+    for sources that were analysed before, whatever the clip settings were.
+    Clips are rendered on ``render_executor`` when provided, otherwise one after
+    another in the calling thread. Each render on the executor holds one of
+    ``render_slots`` while it runs. ``render_workers`` is how many renders can
+    run at once machine-wide; each gets that share of the cores for ffmpeg.
+    ``output_mode="fast"`` skips the vertical render and stream-copies raw cuts.
+    ``on_clip`` receives each clip's info as soon as its file is in ``output_dir``.
+    Each stage is measured into ``job_metrics``; renders are measured inside the
+    render worker. ``source_hash``, the upload's content hash if the caller has it,
+    saves reading it again for the analysis cache key. With ``render_profile_dir``,
+    each render on the executor is profiled in its worker into a
+    ``render_<n>.pstats`` file there.
+    """
+
+    def report(stage: str) -> None:
+        if progress is not None:
+            progress(stage)
 
     clip_duration = max(15, min(int(clip_duration), 120))
-    num_clips = max(1, min(int(num_clips), 5))
+    num_clips = max(1, min(int(num_clips), MAX_CLIPS))
     os.makedirs(output_dir, exist_ok=True)
+    if job_metrics is None:
+        job_metrics = metrics.JobMetrics()
 
     with tempfile.TemporaryDirectory() as temp_dir:
         video_path: str | None = None
@@ -473,61 +1023,213 @@ def generate_clips(
         elif input_type == "YouTube URL":
             if not youtube_url or not youtube_url.strip():
                 raise ValueError("Please enter a YouTube URL.")
+            youtube_url = youtube_url.strip()
+            report("download")
             try:
-                video_path, video_metadata = clipper.download_youtube_video(
-                    youtube_url.strip(), temp_dir
-                )
+                with job_metrics.stage("download") as record:
+                    if YOUTUBE_FETCH_MODE == "full":
+                        video_path, video_metadata = clipper.download_youtube_video(
+                            youtube_url, temp_dir
+                        )
+                        record.input_seconds = video_metadata.get("duration") or None
+                    else:
+                        # Ranged fetch: the video itself is only downloaded for the chosen clips
+                        video_metadata = clipper.fetch_youtube_metadata(youtube_url)
                 video_metadata["source"] = "youtube"
             except Exception as exc:  # pragma: no cover - network interaction
                 raise ValueError(f"Error downloading YouTube video: {exc}") from exc
         else:
             raise ValueError("Unsupported input type. Choose upload or YouTube.")
 
-        if not video_path or not os.path.exists(video_path):
+        ranged_fetch = input_type == "YouTube URL" and video_path is None
+        if not ranged_fetch and (not video_path or not os.path.exists(video_path)):
             raise ValueError("Video file not found or invalid.")
 
-        print("Extracting audio features...")
-        audio_features = clipper.extract_audio_features(video_path)
+        cache_key: str | None = None
+        cached = None
+        if analysis_cache is not None:
+            if video_metadata.get("source") == "youtube":
+                video_id = clipper.youtube_video_id(youtube_url)
+                source_key = f"youtube:{video_id}" if video_id else None
+            else:
+                source_key = f"upload:{source_hash or uploads.content_hash(video_path)}"
+            if source_key:
+                cache_key = f"{clipper.analysis_fingerprint}|{source_key}"
+                cached = analysis_cache.get(cache_key)
+
+        if cached is not None:
+            print("Reusing cached transcript and audio features")
+            segments, audio_features = cached
+        else:
+            analysis_path = video_path
+            if ranged_fetch:
+                try:
+                    with job_metrics.stage("download") as record:
+                        analysis_path = clipper.download_youtube_audio(youtube_url, temp_dir)
+                        record.input_seconds = video_metadata.get("duration") or None
+                except Exception as exc:  # pragma: no cover - network interaction
+                    raise ValueError(f"Error downloading YouTube video: {exc}") from exc
+
+            report("audio")
+            print("Extracting audio features...")
+            with job_metrics.stage("audio") as record:
+                audio = clipper.decode_audio(analysis_path)
+                audio_features = clipper.extract_audio_features(audio)
+                record.input_seconds = len(audio) / AUDIO_SAMPLE_RATE
+
+            report("transcribe")
+            with job_metrics.stage("transcribe", len(audio) / AUDIO_SAMPLE_RATE):
+                segments = clipper.transcribe_video(audio)
+            del audio
+            if segments and cache_key is not None:
+                analysis_cache.put(cache_key, segments, audio_features)
 
-        segments = clipper.transcribe_video(video_path)
         if not segments:
             raise ValueError("Could not transcribe video. Please check the audio quality.")
 
-        best_moments = clipper.find_best_moments(segments, audio_features, clip_duration)
-        best_moments = best_moments[:num_clips]
+        report("score")
+        with job_metrics.stage("score", segments[-1]["end"]):
+            best_moments = clipper.find_best_moments(
+                segments, audio_features, clip_duration, num_clips=num_clips
+            )
         if not best_moments:
             raise ValueError("No suitable clips found. Try adjusting parameters.")
 
-        clip_info: List[Dict] = []
-
-        for idx, moment in enumerate(best_moments, start=1):
-            temp_output = os.path.join(temp_dir, f"clip_{idx}.mp4")
-            clipper.create_clip(
-                video_path,
-                moment["start"],
-                moment["end"],
-                moment["text"],
-                temp_output,
-                add_subtitles,
+        # Split the cores between every render that may run at once, across jobs
+        # and worker processes
+        ffmpeg_threads = max(1, (os.cpu_count() or 1) // render_workers)
+        segment_starts = [segment["start"] for segment in segments]
+
+        def clip_source(idx: int, moment: Dict) -> Tuple[str, float]:
+            """File holding the moment's video and the source time it starts at."""
+            nonlocal video_path
+            if video_path is None:
+                try:
+                    with job_metrics.stage("download", moment["duration"]):
+                        return clipper.download_youtube_range(
+                            youtube_url, moment["start"], moment["end"], temp_dir, f"range_{idx}"
+                        )
+                except Exception as exc:
+                    # e.g. a host that yt-dlp can't cut ranges from; this and
+                    # the remaining clips are cut from the whole video instead
+                    print(f"Ranged download failed ({exc}); downloading the full video")
+                try:
+                    with job_metrics.stage("download") as record:
+                        video_path, _ = clipper.download_youtube_video(youtube_url, temp_dir)
+                        record.input_seconds = video_metadata.get("duration") or None
+                except Exception as exc:  # pragma: no cover - network interaction
+                    raise ValueError(f"Error downloading YouTube video: {exc}") from exc
+            return video_path, 0.0
+
+        # Source time at which each clip's input file starts (ranged downloads)
+        source_offsets: Dict[int, float] = {}
+
+        def render_job(idx: int, moment: Dict) -> Tuple[Callable, Dict]:
+            source_path, offset = clip_source(idx, moment)
+            source_offsets[idx] = offset
+
+            kwargs = {
+                "video_path": source_path,
+                "start_time": moment["start"] - offset,
+                "end_time": moment["end"] - offset,
+                "output_path": os.path.join(temp_dir, f"clip_{idx}.mp4"),
+                "threads": ffmpeg_threads,
+            }
+            if output_mode == "fast":
+                # The start may snap back to a keyframe, but only through the silence
+                # after the previous spoken segment and never by more than the cap
+                first = bisect_left(segment_starts, moment["start"])
+                previous_end = segments[first - 1]["end"] if first > 0 else 0.0
+                earliest = max(previous_end, moment["start"] - FAST_CUT_MAX_SNAP_SECONDS)
+                kwargs["earliest_start"] = max(0.0, earliest - offset)
+                return ffmpeg_render.fast_cut, kwargs
+            kwargs.update(
+                text=moment["text"],
+                add_subtitles=add_subtitles,
+                engine=render_engine,
+                cues=moment["cues"],
             )
+            return clip_render.create_clip, kwargs
+
+        clip_info: List[Dict] = []
+        total = len(best_moments)
+
+        def finish_clip(idx: int, result: Tuple[object, Dict]) -> None:
+            rendered, render_record = result
+            job_metrics.add(metrics.StageRecord.from_dict(render_record))
+            moment = best_moments[idx - 1]
+            start, cues = float(moment["start"]), moment["cues"]
+            if output_mode == "fast":
+                # A keyframe snap starts the cut before the moment; the captions
+                # and reported times follow the file as it was cut
+                temp_output, cut_start = rendered
+                start = float(cut_start) + source_offsets[idx]
+                cues = captions.shift_cues(cues, moment["start"] - start)
+            else:
+                temp_output = rendered
             final_path = os.path.join(output_dir, f"clip_{idx}.mp4")
             shutil.move(temp_output, final_path)
-            clip_info.append(
-                {
-                    "clip_number": idx,
-                    "start_time": float(moment["start"]),
-                    "end_time": float(moment["end"]),
-                    "duration": float(moment["duration"]),
-                    "virality_score": float(moment["virality_score"]),
-                    "text_preview": (
-                        moment["text"][:200] + "..."
-                        if len(moment["text"]) > 200
-                        else moment["text"]
-                    ),
-                    "source_video": video_metadata.get("title", "Unknown"),
-                    "file_name": os.path.basename(final_path),
-                }
-            )
+            captions_path = os.path.join(output_dir, f"clip_{idx}.srt")
+            captions.write_srt(cues, captions_path)
+            info = {
+                "clip_number": idx,
+                "start_time": start,
+                "end_time": float(moment["end"]),
+                "duration": float(moment["end"]) - start,
+                "virality_score": float(moment["virality_score"]),
+                "text_preview": (
+                    moment["text"][:200] + "..."
+                    if len(moment["text"]) > 200
+                    else moment["text"]
+                ),
+                "source_video": video_metadata.get("title", "Unknown"),
+                "file_name": os.path.basename(final_path),
+                "captions_file": os.path.basename(captions_path),
+                "size_bytes": os.path.getsize(final_path),
+            }
+            clip_info.append(info)
+            if on_clip is not None:
+                on_clip(info)
+            report(f"render clip {len(clip_info)}/{total}")
+
+        # Moments go out in rank order, so the top one starts rendering first, and
+        # each clip is published as soon as it is written
+        report(f"render clip 0/{total}")
+        futures: Dict = {}
+        try:
+            for idx, moment in enumerate(best_moments, start=1):
+                if video_path is None:
+                    report("download")
+                render, kwargs = render_job(idx, moment)
+                # Measured inside the render worker, which runs one clip at a time
+                args = (render, "render", moment["duration"])
+                if render_executor is None:
+                    finish_clip(idx, metrics.timed_call(*args, **kwargs))
+                    continue
+                call = metrics.timed_call
+                if render_profile_dir is not None:
+                    profile_path = os.path.join(render_profile_dir, f"render_{idx}.pstats")
+                    call, args = metrics.profiled_call, (profile_path, *args)
+                slot = render_slots.acquire() if render_slots is not None else None
+                try:
+                    future = render_executor.submit(call, *args, **kwargs)
+                except BaseException:
+                    if slot is not None:
+                        render_slots.release(slot)
+                    raise
+                if slot is not None:
+                    # Also runs when the render fails or is cancelled
+                    future.add_done_callback(lambda _, slot=slot: render_slots.release(slot))
+                futures[future] = idx
+                for future in [f for f in futures if f.done()]:
+                    finish_clip(futures.pop(future), future.result())
+            for future in as_completed(futures):
+                finish_clip(futures[future], future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        clip_info.sort(key=lambda clip: clip["clip_number"])
 
         status_msg = (
             f"Successfully created {len(clip_info)} clip(s) from "
@@ -552,11 +1254,75 @@ def _ensure_job_root() -> Path:
 
 JOB_ROOT = _ensure_job_root()
 JOB_TTL_SECONDS = int(os.environ.get("CLIPPER_JOB_TTL_SECONDS", "7200"))
-_jobs_index: Dict[str, Dict] = {}
-_jobs_lock = threading.Lock()
+JOB_WORKERS = max(1, int(os.environ.get("CLIPPER_JOB_WORKERS", "1")))
+ANALYSIS_CACHE_MAX_BYTES = int(
+    os.environ.get("CLIPPER_ANALYSIS_CACHE_MAX_BYTES", str(2 * 1024**3))
+)
+ANALYSIS_CACHE = (
+    AnalysisCache(
+        Path(os.environ.get("CLIPPER_ANALYSIS_CACHE_DIR", "/tmp/firstclass_analysis_cache")),
+        ANALYSIS_CACHE_MAX_BYTES,
+    )
+    if ANALYSIS_CACHE_MAX_BYTES > 0
+    else None
+)
+# Shared by every worker process and kept across restarts
+JOB_STORE = jobstore.JobStore(
+    Path(os.environ.get("CLIPPER_JOB_DB", str(JOB_ROOT / "jobs.sqlite3"))), JOB_TTL_SECONDS
+)
+STORAGE = storage.StorageManager(
+    JOB_ROOT,
+    JOB_STORE,
+    quota_bytes=int(os.environ.get("CLIPPER_STORAGE_QUOTA_BYTES", str(20 * 1024**3))),
+    orphan_grace_seconds=float(os.environ.get("CLIPPER_ORPHAN_GRACE_SECONDS", "600")),
+)
+# Resumable uploads, kept apart from job directories so one file can feed many jobs
+UPLOADS = uploads.UploadStore(
+    Path(os.environ.get("CLIPPER_UPLOAD_DIR", "/tmp/firstclass_uploads")),
+    int(os.environ.get("CLIPPER_UPLOAD_TTL_SECONDS", "86400")),
+)
+_job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="clipper-job")
+RENDER_WORKERS = max(
+    1, int(os.environ.get("CLIPPER_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+)
+DEFAULT_RENDER_ENGINE = os.environ.get("CLIPPER_RENDER_ENGINE", "moviepy")
+# Bounds renders across every job and worker process on the machine
+RENDER_SLOTS = slots.SlotPool(
+    Path(os.environ.get("CLIPPER_RENDER_SLOTS_DIR", "/tmp/firstclass_render_slots")),
+    RENDER_WORKERS,
+)
+_render_pool: ProcessPoolExecutor | None = None
+_render_pool_lock = threading.Lock()
+
+# Written into the job directory when a job is submitted with profile=true
+PROFILE_FILE_NAME = "profile.pstats"
+DOWNLOAD_MEDIA_TYPES = {".mp4": "video/mp4", ".srt": "application/x-subrip"}
+_profile_lock = threading.Lock()
+
+SSE_POLL_SECONDS = 0.5
+SSE_KEEPALIVE_SECONDS = 15.0
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
 
 
-app = FastAPI(title="FirstClass AI Video Clipper", version="1.0.0")
+@asynccontextmanager
+async def _lifespan(_: FastAPI):
+    # Started per serving process rather than at import, so workers forked by
+    # server.py each get their own cleanup thread
+    orphaned = STORAGE.fail_interrupted(
+        (JOB_QUEUED, JOB_RUNNING), JOB_FAILED, "Server restarted before the job finished"
+    )
+    if orphaned:
+        print(f"Marked {orphaned} interrupted job(s) as failed")
+    STORAGE.reclaim_orphans()
+    _start_cleanup_thread()
+    yield
+
+
+app = FastAPI(title="FirstClass AI Video Clipper", version="1.0.0", lifespan=_lifespan)
 
 allowed_origins_env = os.environ.get("CLIPPER_ALLOWED_ORIGINS", "*")
 if allowed_origins_env.strip() == "*":
@@ -578,34 +1344,167 @@ CLIPPER = AIVideoClipper()
 
 
 def _register_job(job_id: str, directory: Path, metadata: Dict) -> None:
-    with _jobs_lock:
-        _jobs_index[job_id] = {
-            "dir": directory,
-            "created": datetime.utcnow(),
-            "metadata": metadata,
-        }
+    JOB_STORE.register(job_id, directory, metadata, JOB_QUEUED)
+
+
+def _update_job(job_id: str, **fields) -> None:
+    JOB_STORE.update(job_id, **fields)
+
+
+def _add_job_clip(job_id: str, job_dir: Path, clip: Dict) -> None:
+    JOB_STORE.add_clip(job_id, clip)
+    STORAGE.record(job_id, [job_dir / clip["file_name"], job_dir / clip["captions_file"]])
+
+
+def _get_job(job_id: str) -> Dict | None:
+    return JOB_STORE.get(job_id)
+
+
+def _job_expires_in(job: Dict) -> int:
+    if job["finished"] is None:
+        return JOB_TTL_SECONDS
+    elapsed = (datetime.utcnow() - job["finished"]).total_seconds()
+    return max(0, JOB_TTL_SECONDS - int(elapsed))
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Render process pool shared by this process's jobs.
+
+    Forking this process would copy its torch and batcher threads' state into
+    the workers, so they start from a fork server instead, which has only the
+    render modules loaded. Concurrency across processes is bounded by
+    ``RENDER_SLOTS``, not by the pool size.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["metrics", "clip_render"])
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=context)
+        return _render_pool
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _record_stage(
+    job_id: str, job_metrics: metrics.JobMetrics, record: metrics.StageRecord
+) -> None:
+    _update_job(job_id, metrics={"stages": job_metrics.as_list()})
+    values = record.histogram_values()
+    JOB_STORE.observe(
+        record.stage,
+        {metric: metrics.bucket_index(metric, value) for metric, value in values.items()},
+        values,
+    )
+
+
+def _run_job(job_id: str, job_dir: Path, options: Dict) -> None:
+    _update_job(job_id, status=JOB_RUNNING)
+    render_pool = _get_render_pool()
+    job_metrics = metrics.JobMetrics(
+        on_record=lambda recorded, record: _record_stage(job_id, recorded, record)
+    )
+    # cProfile allows one active profiler per process, so concurrent profiled
+    # jobs after the first run unprofiled. The profile covers this thread and
+    # the render workers; the inference batcher thread is shared with other
+    # jobs and is left out.
+    profiler = None
+    render_profile_dir = None
+    if options.pop("profile", False) and _profile_lock.acquire(blocking=False):
+        render_profile_dir = job_dir / "render_profiles"
+        render_profile_dir.mkdir(exist_ok=True)
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        status_msg, clips, metadata = generate_clips(
+            clipper=CLIPPER,
+            output_dir=str(job_dir),
+            progress=lambda stage: _update_job(job_id, stage=stage),
+            analysis_cache=ANALYSIS_CACHE,
+            render_executor=render_pool,
+            render_workers=RENDER_WORKERS,
+            render_slots=RENDER_SLOTS,
+            on_clip=lambda clip: _add_job_clip(job_id, job_dir, clip),
+            job_metrics=job_metrics,
+            render_profile_dir=None if render_profile_dir is None else str(render_profile_dir),
+            **options,
+        )
+    except BrokenProcessPool:
+        # A render worker died; start a fresh pool for the next job
+        _discard_render_pool(render_pool)
+        _fail_job(job_id, job_dir, "Failed to process video")
+        return
+    except ValueError as exc:
+        _fail_job(job_id, job_dir, str(exc))
+        return
+    except Exception as exc:  # pragma: no cover - heavy pipeline
+        print(f"Job {job_id} failed: {exc!r}")
+        _fail_job(job_id, job_dir, "Failed to process video")
+        return
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _profile_lock.release()
+            # Render workers' stats are merged in after the job thread's own
+            stats = pstats.Stats(profiler)
+            for part in sorted(render_profile_dir.glob("render_*.pstats")):
+                try:
+                    stats.add(str(part))
+                except (OSError, EOFError, ValueError):
+                    # Cut short by a worker that died mid-dump
+                    pass
+            shutil.rmtree(render_profile_dir, ignore_errors=True)
+        # The upload is only needed while the job runs; clips are what is kept.
+        # Files from the upload API live outside the job and may be reused.
+        uploaded_path = options.get("uploaded_path")
+        if uploaded_path and Path(uploaded_path).parent == job_dir:
+            try:
+                os.remove(uploaded_path)
+            except OSError:
+                pass
+
+    job_metrics_payload: Dict = {"stages": job_metrics.as_list()}
+    if profiler is not None:
+        profile_path = job_dir / PROFILE_FILE_NAME
+        stats.dump_stats(str(profile_path))
+        STORAGE.record(job_id, [profile_path])
+        job_metrics_payload["profile_file"] = PROFILE_FILE_NAME
+
+    _update_job(
+        job_id,
+        status=JOB_DONE,
+        stage=None,
+        status_message=status_msg,
+        metadata=metadata,
+        metrics=job_metrics_payload,
+        finished=datetime.utcnow(),
+    )
+
+
+def _fail_job(job_id: str, job_dir: Path, error: str) -> None:
+    shutil.rmtree(job_dir, ignore_errors=True)
+    JOB_STORE.clear_clips(job_id)
+    _update_job(job_id, status=JOB_FAILED, error=error, finished=datetime.utcnow())
 
 
 def _remove_job(job_id: str) -> None:
-    with _jobs_lock:
-        data = _jobs_index.pop(job_id, None)
-    if data:
-        shutil.rmtree(data["dir"], ignore_errors=True)
+    directory = JOB_STORE.remove(job_id)
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
 
 
 def _cleanup_worker() -> None:
     while True:
         time.sleep(600)
-        now = datetime.utcnow()
-        expired: List[str] = []
-        with _jobs_lock:
-            for job_id, payload in list(_jobs_index.items()):
-                if now - payload["created"] > timedelta(seconds=JOB_TTL_SECONDS):
-                    expired.append(job_id)
-                    _jobs_index.pop(job_id, None)
-        for job_id in expired:
-            directory = JOB_ROOT / job_id
+        for directory in JOB_STORE.pop_expired(datetime.utcnow()):
             shutil.rmtree(directory, ignore_errors=True)
+        UPLOADS.cleanup()
 
 
 def _start_cleanup_thread() -> None:
@@ -613,142 +1512,407 @@ def _start_cleanup_thread() -> None:
     thread.start()
 
 
-_start_cleanup_thread()
-
-
-async def _save_upload(upload: UploadFile, destination: Path) -> None:
+async def _save_upload(upload: UploadFile, destination: Path) -> str:
+    """Write ``upload`` to ``destination`` and return its content hash, computed on the way."""
     destination.parent.mkdir(parents=True, exist_ok=True)
+    digest = uploads.ContentHasher()
     with destination.open("wb") as buffer:
         while chunk := await upload.read(1024 * 1024):
             buffer.write(chunk)
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@asynccontextmanager
+async def _in_threadpool(manager):
+    """Enter and leave a blocking context manager off the event loop."""
+    value = await run_in_threadpool(manager.__enter__)
+    try:
+        yield value
+    except BaseException as exc:
+        if not await run_in_threadpool(manager.__exit__, type(exc), exc, exc.__traceback__):
+            raise
+    else:
+        await run_in_threadpool(manager.__exit__, None, None, None)
+
+
+def _upload_conflict(exc: uploads.UploadConflict) -> JSONResponse:
+    # The offset tells the client where to resume
+    return JSONResponse(status_code=409, content={"detail": str(exc), "offset": exc.offset})
 
 
 @app.get("/api/healthz")
 def healthcheck() -> Dict[str, object]:
-    with _jobs_lock:
-        job_count = len(_jobs_index)
-    return {"ok": True, "jobs_cached": job_count, "ttl_seconds": JOB_TTL_SECONDS}
+    job_count, active = JOB_STORE.counts((JOB_QUEUED, JOB_RUNNING))
+    return {
+        "ok": True,
+        "jobs_cached": job_count,
+        "jobs_active": active,
+        "job_workers": JOB_WORKERS,
+        "ttl_seconds": JOB_TTL_SECONDS,
+        "storage": STORAGE.stats(),
+        "inference_batching": CLIPPER.batcher.stats(),
+    }
+
+
+@app.post("/api/uploads", status_code=201)
+def create_upload(
+    request: Request,
+    filename: str | None = Form(None),
+    size: int | None = Form(None, ge=0, description="total bytes, if known"),
+):
+    upload = UPLOADS.create(filename, size)
+    upload["upload_url"] = str(request.url_for("upload_chunk", upload_id=upload["upload_id"]))
+    return JSONResponse(status_code=201, content=upload)
 
 
-@app.post("/api/process")
+@app.get("/api/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    try:
+        return UPLOADS.status(upload_id)
+    except uploads.UploadNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found") from None
+
+
+@app.put("/api/uploads/{upload_id}", name="upload_chunk")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="position of the first byte in the body"),
+):
+    try:
+        async with _in_threadpool(UPLOADS.append(upload_id, offset)) as writer:
+            async for chunk in request.stream():
+                await run_in_threadpool(writer.write, chunk)
+    except uploads.UploadNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found") from None
+    except uploads.UploadConflict as exc:
+        return _upload_conflict(exc)
+    return {"upload_id": upload_id, "offset": writer.offset}
+
+
+@app.post("/api/uploads/{upload_id}/complete")
+def complete_upload(upload_id: str):
+    try:
+        return UPLOADS.complete(upload_id)
+    except uploads.UploadNotFound:
+        raise HTTPException(status_code=404, detail="Upload not found") from None
+    except uploads.UploadConflict as exc:
+        return _upload_conflict(exc)
+
+
+@app.post("/api/process", status_code=202)
 async def process_endpoint(
     request: Request,
     input_type: str = Form(..., description="Upload Video File or YouTube URL"),
     clip_duration: int = Form(30, ge=15, le=120),
-    num_clips: int = Form(3, ge=1, le=5),
+    num_clips: int = Form(3, ge=1, le=MAX_CLIPS),
     add_subtitles: bool | None = Form(True),
     youtube_url: str | None = Form(None),
     video_file: UploadFile | None = File(None),
+    render_engine: str | None = Form(None, description="moviepy or ffmpeg"),
+    output_mode: str = Form("vertical", description="vertical or fast"),
+    profile: bool | None = Form(False, description="dump a cProfile of the job"),
+    upload_id: str | None = Form(None, description="completed upload from /api/uploads"),
 ):
+    render_engine = render_engine or DEFAULT_RENDER_ENGINE
+    if render_engine not in RENDER_ENGINES:
+        raise HTTPException(status_code=400, detail="Unsupported render_engine provided.")
+    if output_mode not in OUTPUT_MODES:
+        raise HTTPException(status_code=400, detail="Unsupported output_mode provided.")
+
     job_id = uuid.uuid4().hex
     job_dir = JOB_ROOT / job_id
     job_dir.mkdir(parents=True, exist_ok=True)
 
     uploaded_path: Path | None = None
+    source_hash: str | None = None
     try:
         if input_type == "Upload Video File":
-            if video_file is None:
+            if upload_id:
+                try:
+                    uploaded_path, source_hash = UPLOADS.resolve(upload_id)
+                except uploads.UploadNotFound:
+                    raise HTTPException(status_code=404, detail="Upload not found") from None
+                except uploads.UploadConflict as exc:
+                    raise HTTPException(status_code=409, detail=str(exc)) from None
+            elif video_file is None:
                 raise HTTPException(status_code=400, detail="Please upload a video file.")
-            filename = video_file.filename or "upload.mp4"
-            uploaded_path = job_dir / filename
-            await _save_upload(video_file, uploaded_path)
+            else:
+                filename = video_file.filename or "upload.mp4"
+                uploaded_path = job_dir / filename
+                source_hash = await _save_upload(video_file, uploaded_path)
         elif input_type == "YouTube URL":
             if not youtube_url or not youtube_url.strip():
                 raise HTTPException(status_code=400, detail="Please provide a YouTube URL.")
         else:
             raise HTTPException(status_code=400, detail="Unsupported input_type provided.")
-
-        status_msg, clips, metadata = generate_clips(
-            clipper=CLIPPER,
-            input_type=input_type,
-            uploaded_path=str(uploaded_path) if uploaded_path else None,
-            youtube_url=youtube_url,
-            clip_duration=clip_duration,
-            num_clips=num_clips,
-            add_subtitles=_parse_bool(add_subtitles, True),
-            output_dir=str(job_dir),
-        )
     except HTTPException:
         shutil.rmtree(job_dir, ignore_errors=True)
         raise
-    except ValueError as exc:
-        shutil.rmtree(job_dir, ignore_errors=True)
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:  # pragma: no cover - heavy pipeline
-        shutil.rmtree(job_dir, ignore_errors=True)
-        raise HTTPException(status_code=500, detail="Failed to process video") from exc
-
-    _register_job(job_id, job_dir, metadata)
 
-    clips_payload: List[Dict] = []
-    for clip in clips:
-        download_url = request.url_for(
-            "download_clip", job_id=job_id, filename=clip["file_name"]
-        )
-        clips_payload.append({**clip, "download_url": download_url})
+    _register_job(job_id, job_dir, {})
+    _job_executor.submit(
+        _run_job,
+        job_id,
+        job_dir,
+        {
+            "input_type": input_type,
+            "uploaded_path": str(uploaded_path) if uploaded_path else None,
+            "youtube_url": youtube_url,
+            "clip_duration": clip_duration,
+            "num_clips": num_clips,
+            "add_subtitles": _parse_bool(add_subtitles, True),
+            "render_engine": render_engine,
+            "output_mode": output_mode,
+            "profile": _parse_bool(profile, False),
+            "source_hash": source_hash,
+        },
+    )
 
-    return {
-        "job_id": job_id,
-        "status_message": status_msg,
-        "metadata": metadata,
-        "clips": clips_payload,
-        "expires_in_seconds": JOB_TTL_SECONDS,
-    }
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "status": JOB_QUEUED,
+            "status_url": str(request.url_for("get_job", job_id=job_id)),
+        },
+    )
 
 
-@app.get("/api/jobs/{job_id}")
+@app.get("/api/jobs/{job_id}", name="get_job")
 def get_job(job_id: str, request: Request):
-    with _jobs_lock:
-        job = _jobs_index.get(job_id)
+    job = _get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
     clips: List[Dict] = []
-    for file in sorted(job["dir"].glob("clip_*.mp4")):
-        download_url = request.url_for(
-            "download_clip", job_id=job_id, filename=file.name
-        )
+    for clip in job["clips"]:
         clips.append({
-            "file_name": file.name,
-            "download_url": download_url,
-            "size_bytes": file.stat().st_size,
+            **clip,
+            "download_url": request.url_for(
+                "download_clip", job_id=job_id, filename=clip["file_name"]
+            ),
+            "captions_url": request.url_for(
+                "download_clip", job_id=job_id, filename=clip["captions_file"]
+            ),
         })
 
     return {
         "job_id": job_id,
+        "status": job["status"],
+        "stage": job["stage"],
+        "status_message": job["status_message"],
+        "error": job["error"],
         "metadata": job["metadata"],
         "created_at": job["created"].isoformat() + "Z",
         "clips": clips,
-        "expires_in_seconds": max(
-            0,
-            JOB_TTL_SECONDS - int((datetime.utcnow() - job["created"]).total_seconds()),
+        "bundle_url": (
+            str(request.url_for("download_bundle", job_id=job_id))
+            if job["status"] == JOB_DONE
+            else None
         ),
+        "metrics": _metrics_payload(job_id, job, request),
+        "expires_in_seconds": _job_expires_in(job),
     }
 
 
+def _metrics_payload(job_id: str, job: Dict, request: Request) -> Dict:
+    payload = {"stages": job["metrics"].get("stages", [])}
+    if job["metrics"].get("profile_file"):
+        payload["profile_url"] = str(
+            request.url_for(
+                "download_clip", job_id=job_id, filename=job["metrics"]["profile_file"]
+            )
+        )
+    return payload
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    """Per-stage histograms of every job served by any worker, in Prometheus format."""
+    return PlainTextResponse(
+        metrics.render_prometheus(*JOB_STORE.histograms()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+def _sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-Sent Events stream of a job's progress.
+
+    Emits ``progress`` whenever the status or stage changes, ``clip`` as soon as
+    each clip is written (with its download URL), and finally ``done`` or
+    ``failed``.
+    """
+    # The job store is SQLite; its lookups can block and stay off the event loop
+    if await run_in_threadpool(_get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last_progress = None
+        sent_clips: set = set()
+        idle = 0.0
+        while not await request.is_disconnected():
+            job = await run_in_threadpool(_get_job, job_id)
+            if job is None:
+                yield _sse_event(JOB_FAILED, {"job_id": job_id, "error": "Job not found"})
+                return
+
+            progress = (job["status"], job["stage"])
+            if progress != last_progress:
+                last_progress = progress
+                idle = 0.0
+                yield _sse_event(
+                    "progress",
+                    {"job_id": job_id, "status": job["status"], "stage": job["stage"]},
+                )
+            for clip in job["clips"]:
+                if clip["file_name"] in sent_clips:
+                    continue
+                sent_clips.add(clip["file_name"])
+                idle = 0.0
+                download_url = request.url_for(
+                    "download_clip", job_id=job_id, filename=clip["file_name"]
+                )
+                captions_url = request.url_for(
+                    "download_clip", job_id=job_id, filename=clip["captions_file"]
+                )
+                yield _sse_event(
+                    "clip",
+                    {
+                        **clip,
+                        "download_url": str(download_url),
+                        "captions_url": str(captions_url),
+                    },
+                )
+
+            if job["status"] == JOB_DONE:
+                yield _sse_event(
+                    JOB_DONE,
+                    {
+                        "job_id": job_id,
+                        "status_message": job["status_message"],
+                        "metadata": job["metadata"],
+                        "expires_in_seconds": _job_expires_in(job),
+                    },
+                )
+                return
+            if job["status"] == JOB_FAILED:
+                yield _sse_event(JOB_FAILED, {"job_id": job_id, "error": job["error"]})
+                return
+
+            await asyncio.sleep(SSE_POLL_SECONDS)
+            idle += SSE_POLL_SECONDS
+            if idle >= SSE_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class _ZipSink:
+    """Write-only file object for ``zipfile``; the caller drains what was written.
+
+    Having no ``tell`` or ``seek`` makes ``zipfile`` stream: each entry's sizes
+    and CRC follow its data in a data descriptor instead of being patched in.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def _stream_zip(manifest: Dict, files: List[Tuple[str, Path]]):
+    """Yield a stored (uncompressed) ZIP of ``files`` plus ``manifest.json`` as it is built."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        yield from sink.drain()
+        for arcname, path in files:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zipfile.ZIP_STORED
+            with open(path, "rb") as source, archive.open(
+                info, "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT
+            ) as entry:
+                while block := source.read(1024 * 1024):
+                    entry.write(block)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+# Declared before download_clip, whose {filename} would match it too
+@app.get("/api/jobs/{job_id}/bundle.zip", name="download_bundle")
+def download_bundle(job_id: str):
+    job = _get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != JOB_DONE:
+        raise HTTPException(status_code=409, detail="Job is not finished")
+
+    files: List[Tuple[str, Path]] = []
+    for clip in job["clips"]:
+        for name in (clip["file_name"], clip.get("captions_file")):
+            if name and (job["dir"] / name).exists():
+                files.append((name, job["dir"] / name))
+    if not files:
+        raise HTTPException(status_code=404, detail="Clips not found")
+    JOB_STORE.touch(job_id)
+
+    manifest = {
+        "job_id": job_id,
+        "status_message": job["status_message"],
+        "metadata": job["metadata"],
+        "created_at": job["created"].isoformat() + "Z",
+        "clips": job["clips"],
+    }
+    return StreamingResponse(
+        _stream_zip(manifest, files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.zip"'},
+    )
+
+
 @app.get("/api/jobs/{job_id}/{filename}", name="download_clip")
 def download_clip(job_id: str, filename: str):
-    with _jobs_lock:
-        job = _jobs_index.get(job_id)
+    job = _get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
     file_path = job["dir"] / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Clip not found")
+    JOB_STORE.touch(job_id)
 
     return FileResponse(
         file_path,
-        media_type="video/mp4",
+        media_type=DOWNLOAD_MEDIA_TYPES.get(file_path.suffix, "application/octet-stream"),
         filename=filename,
     )
 
 
 @app.delete("/api/jobs/{job_id}")
 def delete_job(job_id: str):
-    with _jobs_lock:
-        exists = job_id in _jobs_index
-    if not exists:
+    if not JOB_STORE.exists(job_id):
         raise HTTPException(status_code=404, detail="Job not found")
     _remove_job(job_id)
     return JSONResponse({"ok": True})
@@ -757,8 +1921,10 @@ def delete_job(job_id: str):
 def run() -> None:
     import uvicorn
 
+    # Pass the app object itself: an "app:app" import string would import this
+    # file a second time under its module name and load every model again
     uvicorn.run(
-        "app:app",
+        app,
         host="0.0.0.0",
         port=int(os.environ.get("PORT", "7860")),
         reload=False,
@@ -0,0 +1,137 @@
+"""Dynamic micro-batching for model calls shared by concurrent jobs.
+
+Jobs submit texts and get one future per text back. A single background
+thread drains the queue into batches, flushing when ``max_batch_size`` texts
+are waiting or the oldest has waited ``max_wait_seconds``. Texts from jobs
+that score at the same time then share forward passes instead of competing
+for the cores with their own small batches.
+
+The thread is started on first use in the process that submits, so a batcher
+created before ``server.py`` forks works in every worker.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+
+class InferenceBatcher:
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], List],
+        max_batch_size: int = 32,
+        max_wait_seconds: float = 0.01,
+        name: str = "inference-batcher",
+    ) -> None:
+        """``run_batch`` maps a list of texts to one result per text, in order."""
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_seconds)
+        self.name = name
+        self._start_lock = threading.Lock()
+        self._queue: queue.SimpleQueue | None = None
+        self._pid: int | None = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "requests": 0,
+            "texts": 0,
+            "max_batch_size_seen": 0,
+            "wait_seconds_total": 0.0,
+            "run_seconds_total": 0.0,
+        }
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        """Queue ``texts``; each future resolves to that text's result."""
+        pending = self._ensure_started()
+        futures = []
+        now = time.perf_counter()
+        for text in texts:
+            future: Future = Future()
+            pending.put((text, future, now))
+            futures.append(future)
+        return futures
+
+    def map(self, texts: List[str]) -> List:
+        return [future.result() for future in self.submit(texts)]
+
+    def _ensure_started(self) -> queue.SimpleQueue:
+        with self._start_lock:
+            if self._queue is None or self._pid != os.getpid():
+                # Threads don't survive fork; a forked child starts its own
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                threading.Thread(
+                    target=self._worker, args=(self._queue,), name=self.name, daemon=True
+                ).start()
+            return self._queue
+
+    def _collect(self, pending: queue.SimpleQueue) -> List[Tuple[str, Future, float]]:
+        batch = [pending.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            try:
+                # Whatever is already queued joins without waiting
+                batch.append(pending.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self, pending: queue.SimpleQueue) -> None:
+        while True:
+            batch = [
+                item for item in self._collect(pending) if item[1].set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            # Identical texts are scored once; length order keeps padding low
+            unique = sorted({text for text, _, _ in batch}, key=len)
+            try:
+                results = dict(zip(unique, self.run_batch(unique)))
+            except Exception as exc:  # pragma: no cover - model failure
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+            for text, future, _ in batch:
+                future.set_result(results[text])
+
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["requests"] += len(batch)
+                self._stats["texts"] += len(unique)
+                self._stats["max_batch_size_seen"] = max(
+                    self._stats["max_batch_size_seen"], len(unique)
+                )
+                self._stats["wait_seconds_total"] += sum(started - queued for _, _, queued in batch)
+                self._stats["run_seconds_total"] += finished - started
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats.pop("batches")
+        requests = stats.pop("requests")
+        texts = stats.pop("texts")
+        wait_total = stats.pop("wait_seconds_total")
+        run_total = stats.pop("run_seconds_total")
+        return {
+            "batches": batches,
+            "texts": texts,
+            "mean_batch_size": texts / batches if batches else 0.0,
+            "max_batch_size": stats["max_batch_size_seen"],
+            "mean_wait_ms": 1000 * wait_total / requests if requests else 0.0,
+            "mean_batch_ms": 1000 * run_total / batches if batches else 0.0,
+            "texts_per_second": texts / run_total if run_total else 0.0,
+        }
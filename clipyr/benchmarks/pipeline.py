@@ -0,0 +1,226 @@
+"""Offline benchmark of every pipeline stage, in isolation and end to end.
+
+Run from the ``clipyr`` directory::
+
+    python -m benchmarks.pipeline --durations 60,300 --resolutions 640x360,1280x720 \\
+        --output results.json --baseline previous.json
+
+Synthetic sources (test pattern video plus tone audio) are generated locally
+with ffmpeg, so no network access is needed. ``--models stub`` swaps Whisper
+and both classifiers for the stand-ins in ``benchmarks.stubs``. The default,
+``auto``, does that only when the real weights are not cached. Real Whisper
+hears no speech in the synthetic tone, so use ``--source`` with a real
+recording to time transcription and scoring on real models.
+
+Results are written as JSON: per source and stage, the wall/CPU time, peak
+RSS, real-time factor and throughput. ``--baseline`` prints the wall-time
+ratio of each stage against an earlier results file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+# Nothing is loaded at import; the clipper below gets its models explicitly
+os.environ.setdefault("CLIPPER_PRELOAD_MODELS", "0")
+
+from benchmarks import stubs  # noqa: E402
+from benchmarks.render import make_source  # noqa: E402
+
+
+def _stage(records: List[Dict], record, **throughput) -> None:
+    entry = record.as_dict()
+    entry["throughput"] = {
+        name: (count / record.wall_seconds if record.wall_seconds else None)
+        for name, count in throughput.items()
+    }
+    records.append(entry)
+    rtf = entry["real_time_factor"]
+    print(
+        f"  {entry['stage']:<10} {entry['wall_seconds']:8.3f}s wall  "
+        f"{entry['cpu_seconds']:8.3f}s CPU  "
+        f"{entry['peak_rss_bytes'] / 1024**2:7.0f} MB  "
+        + (f"RTF {rtf:.4f}" if rtf is not None else "")
+    )
+
+
+def bench_source(clipper, source: str, duration: float, args) -> List[Dict]:
+    import app
+    import ffmpeg_render
+    import metrics
+
+    records: List[Dict] = []
+    with metrics.measure("decode", duration) as record:
+        audio = clipper.decode_audio(source)
+    _stage(records, record, media_seconds=duration)
+
+    with metrics.measure("features", duration) as record:
+        audio_features = clipper.extract_audio_features(audio)
+    _stage(records, record, media_seconds=duration)
+
+    with metrics.measure("transcribe", duration) as record:
+        segments = clipper.transcribe_video(audio)
+    _stage(records, record, media_seconds=duration, segments=len(segments))
+    del audio
+    if not segments:
+        print("  no speech found; skipping scoring, selection and rendering")
+        return records
+
+    windows = clipper.window_bounds(segments, args.clip_duration)
+    with metrics.measure("score", duration) as record:
+        moments = clipper.find_best_moments(
+            segments, audio_features, args.clip_duration, num_clips=args.clips
+        )
+    _stage(records, record, windows=len(windows))
+
+    # Selection alone, over every window with a synthetic score
+    candidates = [
+        {
+            "start": segments[i]["start"],
+            "end": segments[j - 1]["end"],
+            "virality_score": (i * 7919 % 100) / 10,
+        }
+        for i, j in windows
+    ]
+    with metrics.measure("selection") as record:
+        app.select_moments(candidates, args.clips, app.MIN_CLIP_SPACING_SECONDS)
+    _stage(records, record, windows=len(candidates))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        moment = moments[0]
+        clip_seconds = moment["end"] - moment["start"]
+        for engine in app.RENDER_ENGINES:
+            with metrics.measure(f"render_{engine}", clip_seconds) as record:
+                app.AIVideoClipper.create_clip(
+                    source,
+                    moment["start"],
+                    moment["end"],
+                    moment["text"],
+                    os.path.join(temp_dir, f"{engine}.mp4"),
+                    engine=engine,
+                    cues=moment["cues"],
+                )
+            _stage(records, record, frames=clip_seconds * 30)
+
+        with metrics.measure("fast_cut", clip_seconds) as record:
+            ffmpeg_render.fast_cut(
+                source, moment["start"], moment["end"], os.path.join(temp_dir, "fast.mp4")
+            )
+        _stage(records, record, media_seconds=clip_seconds)
+
+        with metrics.measure("end_to_end", duration) as record:
+            app.generate_clips(
+                clipper=clipper,
+                input_type="Upload Video File",
+                uploaded_path=source,
+                youtube_url=None,
+                clip_duration=args.clip_duration,
+                num_clips=args.clips,
+                add_subtitles=True,
+                output_dir=os.path.join(temp_dir, "clips"),
+                render_engine=args.engine,
+            )
+        _stage(records, record, media_seconds=duration)
+    return records
+
+
+def compare(results: Dict, baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    previous = {
+        (run["source"]["name"], stage["stage"]): stage["wall_seconds"]
+        for run in baseline["runs"]
+        for stage in run["stages"]
+    }
+    print(f"\nWall time against {baseline_path} (>1 is slower):")
+    for run in results["runs"]:
+        for stage in run["stages"]:
+            before = previous.get((run["source"]["name"], stage["stage"]))
+            if before:
+                ratio = stage["wall_seconds"] / before
+                print(f"  {run['source']['name']:<18} {stage['stage']:<12} {ratio:6.2f}x")
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", default="60,300", help="seconds, comma separated")
+    parser.add_argument("--resolutions", default="640x360,1280x720")
+    parser.add_argument("--source", action="append", default=[], help="real media to add")
+    parser.add_argument("--models", choices=("auto", "stub", "real"), default="auto")
+    parser.add_argument("--clip-duration", type=int, default=30)
+    parser.add_argument("--clips", type=int, default=3)
+    parser.add_argument("--engine", choices=("moviepy", "ffmpeg"), default="ffmpeg")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    import app
+
+    use_stubs = args.models == "stub" or (
+        args.models == "auto" and not stubs.real_weights_cached(app.WHISPER_MODEL)
+    )
+    models = stubs.stub_models() if use_stubs else {}
+    clipper = app.AIVideoClipper(**models, preload_models=True)
+
+    results = {
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "models": "stub" if use_stubs else "real",
+            "render_engine": args.engine,
+            "git_revision": _git_revision(),
+        },
+        "runs": [],
+    }
+    with tempfile.TemporaryDirectory() as media_dir:
+        sources = []
+        for duration in (float(d) for d in args.durations.split(",")):
+            for size in args.resolutions.split(","):
+                name = f"synthetic_{duration:g}s_{size}"
+                path = make_source(os.path.join(media_dir, f"{name}.mp4"), duration, size)
+                sources.append({"name": name, "path": path, "duration": duration, "size": size})
+        for path in args.source:
+            audio = app.AIVideoClipper.decode_audio(path)
+            sources.append(
+                {
+                    "name": os.path.basename(path),
+                    "path": path,
+                    "duration": len(audio) / app.AUDIO_SAMPLE_RATE,
+                    "size": None,
+                }
+            )
+
+        for source in sources:
+            print(f"{source['name']}:")
+            stages = bench_source(clipper, source["path"], source["duration"], args)
+            results["runs"].append(
+                {
+                    "source": {k: source[k] for k in ("name", "duration", "size")},
+                    "stages": stages,
+                }
+            )
+
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
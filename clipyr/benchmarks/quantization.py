@@ -0,0 +1,125 @@
+"""Accuracy, latency and memory of the classifier precision modes.
+
+Run from the ``clipyr`` directory::
+
+    python -m benchmarks.quantization --repeats 5
+
+Each mode is loaded in its own subprocess so peak RSS is measured in
+isolation. Labels and scores of every mode are compared against fp32 on a
+fixed corpus.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import inference
+from benchmarks.scoring import SENTENCES
+
+# The scoring benchmark's sentences, plus lines that reach the other labels
+# (anger, sadness, fear, neutral) so every label's agreement is measured
+CORPUS = SENTENCES + [
+    "I was furious when they cancelled the launch without telling anyone.",
+    "That was the saddest goodbye I have ever had to say.",
+    "Honestly I'm terrified of what happens if this fails.",
+    "The weather was fine and the meeting started on time.",
+    "Nobody expected the underdog to win the whole tournament.",
+    "I hate how expensive everything has become this year.",
+    "This tiny habit completely changed how I spend my mornings.",
+    "We lost everything in one night and had to start over.",
+    "Watch this, it's the craziest thing I've seen all month.",
+    "The report covers revenue, costs and headcount for the quarter.",
+    "She finally told me the secret behind her recipe.",
+    "I can't stop smiling, this is the best news ever!",
+]
+
+
+def run_worker(precision: str, repeats: int, batch_size: int) -> dict:
+    started = time.perf_counter()
+    sentiment, emotion = inference.load_text_classifiers(precision)
+    load_seconds = time.perf_counter() - started
+
+    import torch
+
+    options = {"batch_size": batch_size, "truncation": True, "padding": True}
+    with torch.inference_mode():
+        # Warm-up pass so one-time allocations don't skew the latency numbers
+        sentiment(CORPUS, **options)
+        emotion(CORPUS, **options)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            sentiments = sentiment(CORPUS, **options)
+            emotions = emotion(CORPUS, **options)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "precision": precision,
+        "load_seconds": load_seconds,
+        "ms_per_text": elapsed * 1000 / (repeats * len(CORPUS)),
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "sentiment": sentiments,
+        "emotion": emotions,
+    }
+
+
+def compare(reference: dict, candidate: dict) -> dict:
+    agreement = {}
+    for task in ("sentiment", "emotion"):
+        pairs = list(zip(reference[task], candidate[task]))
+        same = sum(1 for ref, cand in pairs if ref["label"] == cand["label"])
+        score_diffs = [
+            abs(ref["score"] - cand["score"]) for ref, cand in pairs if ref["label"] == cand["label"]
+        ]
+        agreement[task] = {
+            "label_agreement": same / len(pairs),
+            "max_score_diff": max(score_diffs, default=0.0),
+        }
+    return agreement
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--worker", choices=inference.PRECISIONS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(run_worker(args.worker, args.repeats, args.batch_size), sys.stdout)
+        return
+
+    results = {}
+    for precision in inference.PRECISIONS:
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.quantization",
+                "--worker", precision,
+                "--repeats", str(args.repeats),
+                "--batch-size", str(args.batch_size),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[precision] = json.loads(output.strip().splitlines()[-1])
+
+    reference = results["fp32"]
+    for precision, result in results.items():
+        print(
+            f"{precision:>5}: {result['ms_per_text']:7.2f} ms/text  "
+            f"load {result['load_seconds']:5.1f}s  peak RSS {result['peak_rss_mb']:7.1f} MB"
+        )
+        if precision != "fp32":
+            for task, stats in compare(reference, result).items():
+                print(
+                    f"       {task:<9} label agreement {stats['label_agreement']:.0%}  "
+                    f"max score diff {stats['max_score_diff']:.4f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare the moviepy and ffmpeg clip render engines.
+
+Run from the ``clipyr`` directory::
+
+    python -m benchmarks.render --duration 30 --source-size 1280x720
+
+A synthetic source video is generated with ffmpeg unless ``--source`` is given.
+CPU time includes the ffmpeg child processes both engines spawn.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+import clip_render
+
+CAPTION = (
+    "You won't believe how much money this simple trick saved us, "
+    "it was honestly the most amazing upgrade we made all year"
+)
+
+
+def make_source(path: str, duration: float, size: str) -> str:
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={duration}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path,
+        ],
+        check=True,
+    )
+    return path
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", help="existing video to cut from")
+    parser.add_argument("--source-size", default="1280x720")
+    parser.add_argument("--duration", type=float, default=30.0, help="clip length in seconds")
+    parser.add_argument("--no-subtitles", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = args.source or make_source(
+            os.path.join(temp_dir, "source.mp4"), args.duration + 2, args.source_size
+        )
+        frames = args.duration * 30
+        for engine in ("moviepy", "ffmpeg"):
+            output = os.path.join(temp_dir, f"{engine}.mp4")
+            cpu_before = cpu_seconds()
+            started = time.perf_counter()
+            clip_render.create_clip(
+                source,
+                1.0,
+                1.0 + args.duration,
+                CAPTION,
+                output,
+                add_subtitles=not args.no_subtitles,
+                engine=engine,
+            )
+            wall = time.perf_counter() - started
+            cpu = cpu_seconds() - cpu_before
+            print(
+                f"{engine:>8}: {wall:6.2f}s wall  {frames / wall:7.1f} fps  "
+                f"{cpu:6.2f}s CPU  {os.path.getsize(output) / 1e6:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
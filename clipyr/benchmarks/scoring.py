@@ -0,0 +1,106 @@
+"""Compare per-window and segment-level virality scoring throughput.
+
+Run from the ``clipyr`` directory::
+
+    python -m benchmarks.scoring --segments 1500 --batch-size 32
+
+``--jobs N`` also scores N jobs' worth of distinct texts concurrently, once
+with every thread running its own batches and once through the shared
+cross-job batcher.
+"""
+
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+SENTENCES = [
+    "You won't believe what happened when we finally tried this.",
+    "Most people never talk about the money side of the business.",
+    "Here's what nobody tells you about your first time on stage.",
+    "It was a slow week, honestly nothing much changed.",
+    "This is why the simple trick works better than the expensive upgrade.",
+    "We laughed so hard that everyone in the room started to cry.",
+    "The truth about success is that it takes a lot of boring work.",
+    "Wait for it, the reveal at the end is the best part.",
+]
+
+
+def synthetic_segments(count: int, seconds_per_segment: float = 2.4) -> List[Dict]:
+    sentences = itertools.cycle(SENTENCES)
+    segments: List[Dict] = []
+    for idx in range(count):
+        start = idx * seconds_per_segment
+        segments.append(
+            {
+                "start": start,
+                "end": start + seconds_per_segment,
+                "text": next(sentences),
+                "words": [],
+            }
+        )
+    return segments
+
+
+def concurrent_throughput(clipper, jobs: int, texts_per_job: int) -> None:
+    # Tagged so every text is distinct and nothing is deduplicated away
+    corpora = [
+        [f"{SENTENCES[idx % len(SENTENCES)]} ({job}/{idx})" for idx in range(texts_per_job)]
+        for job in range(jobs)
+    ]
+    total = jobs * texts_per_job
+    modes = (("per-job batches", clipper.score_batch_size), ("shared batcher", None))
+    for label, batch_size in modes:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(lambda texts: clipper.classify_texts(texts, batch_size), corpora))
+        elapsed = time.perf_counter() - started
+        print(f"{jobs} concurrent jobs, {label:<15}: {total / elapsed:8.1f} texts/sec")
+    stats = clipper.batcher.stats()
+    print(
+        f"batcher: {stats['batches']} batches, mean size {stats['mean_batch_size']:.1f}, "
+        f"mean wait {stats['mean_wait_ms']:.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=600)
+    parser.add_argument("--clip-duration", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--jobs", type=int, default=1, help="concurrent jobs to simulate")
+    parser.add_argument("--texts-per-job", type=int, default=200)
+    args = parser.parse_args()
+
+    from app import CLIPPER
+
+    segments = synthetic_segments(args.segments)
+    audio_features = {"tempo": 110.0, "energy_variance": 0.02}
+    windows = CLIPPER.window_bounds(segments, args.clip_duration)
+
+    started = time.perf_counter()
+    for i, j in windows:
+        text = " ".join(s["text"] for s in segments[i:j])
+        duration = segments[j - 1]["end"] - segments[i]["start"]
+        CLIPPER.calculate_virality_score(text, audio_features, duration)
+    per_window_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    CLIPPER.find_best_moments(
+        segments, audio_features, args.clip_duration, batch_size=args.batch_size
+    )
+    batched_seconds = time.perf_counter() - started
+
+    batch_size = args.batch_size or CLIPPER.score_batch_size
+    print(f"windows: {len(windows)}")
+    print(f"per-window:                {len(windows) / per_window_seconds:8.1f} windows/sec")
+    print(f"segment-level (batch {batch_size:>3}): {len(windows) / batched_seconds:8.1f} windows/sec")
+    print(f"speedup: {per_window_seconds / batched_seconds:.2f}x")
+
+    if args.jobs > 1:
+        concurrent_throughput(CLIPPER, args.jobs, args.texts_per_job)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Lightweight stand-ins for the Whisper and text-classifier models.
+
+They return output in the same shape as the real models, at almost no cost
+and without downloading any weights. Pipeline timings then measure the code
+around the models. Output is deterministic, so runs can be compared.
+"""
+
+import os
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.scoring import SENTENCES
+
+SAMPLE_RATE = 16000
+SENTIMENT_LABELS = ("POSITIVE", "NEGATIVE")
+EMOTION_LABELS = ("joy", "surprise", "neutral", "sadness", "anger", "fear")
+
+
+class StubWhisper:
+    """One scripted sentence per ``seconds_per_segment`` of audio, words evenly spaced."""
+
+    def __init__(self, seconds_per_segment: float = 2.4) -> None:
+        self.seconds_per_segment = seconds_per_segment
+
+    def transcribe(self, audio: np.ndarray, word_timestamps: bool = True, **_) -> Dict:
+        duration = len(audio) / SAMPLE_RATE
+        segments: List[Dict] = []
+        start, idx = 0.0, 0
+        while start + self.seconds_per_segment <= duration:
+            end = start + self.seconds_per_segment
+            text = SENTENCES[idx % len(SENTENCES)]
+            tokens = text.split()
+            step = self.seconds_per_segment / len(tokens)
+            words = [
+                {"word": f" {token}", "start": start + k * step, "end": start + (k + 1) * step}
+                for k, token in enumerate(tokens)
+            ]
+            segments.append(
+                {
+                    "start": start,
+                    "end": end,
+                    "text": f" {text}",
+                    "words": words if word_timestamps else [],
+                }
+            )
+            start, idx = end, idx + 1
+        return {"segments": segments, "text": " ".join(s["text"] for s in segments)}
+
+
+class StubClassifier:
+    """Callable like a transformers text-classification pipeline; labels are a hash of the text."""
+
+    def __init__(self, labels: tuple) -> None:
+        self.labels = labels
+
+    def _predict(self, text: str) -> Dict:
+        digest = zlib.crc32(text.encode("utf-8"))
+        return {
+            "label": self.labels[digest % len(self.labels)],
+            "score": 0.5 + (digest >> 8) % 500 / 1000,
+        }
+
+    def __call__(self, texts, **_) -> List[Dict]:
+        if isinstance(texts, str):
+            texts = [texts]
+        return [self._predict(text) for text in texts]
+
+
+def stub_models() -> Dict:
+    """Keyword arguments for ``AIVideoClipper`` that replace every model with a stub."""
+    return {
+        "whisper_model": StubWhisper(),
+        "sentiment_analyzer": StubClassifier(SENTIMENT_LABELS),
+        "emotion_analyzer": StubClassifier(EMOTION_LABELS),
+    }
+
+
+def real_weights_cached(whisper_model_name: str = "base") -> bool:
+    """Whether the Whisper and classifier weights are already on disk, so no download is needed."""
+    import inference
+
+    cache = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    if not os.path.exists(os.path.join(cache, "whisper", f"{whisper_model_name}.pt")):
+        return False
+    hub = os.environ.get(
+        "HF_HUB_CACHE",
+        os.path.join(os.environ.get("HF_HOME", os.path.join(cache, "huggingface")), "hub"),
+    )
+    return all(
+        os.path.isdir(os.path.join(hub, "models--" + name.replace("/", "--")))
+        for name in (inference.SENTIMENT_MODEL, inference.EMOTION_MODEL)
+    )
@@ -0,0 +1,159 @@
+"""Real-time factor and word error rate of the transcription backends.
+
+Run from the ``clipyr`` directory::
+
+    python -m benchmarks.transcription --audio talk.wav --reference talk.txt
+    python -m benchmarks.transcription --synthesize --backends whisper,faster-whisper
+
+Every backend transcribes the same local audio, each in its own subprocess
+so model load time and peak RSS are measured in isolation. WER is computed
+against ``--reference``. ``--synthesize`` makes the test audio with
+ffmpeg's ``flite`` speech synthesizer, which needs an ffmpeg built with
+libflite; the scripted text is then the reference. Without any reference,
+the first backend's transcript stands in for it.
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import transcription
+from benchmarks.scoring import SENTENCES
+
+
+def normalize(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance divided by the reference length."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def synthesize(path: str, text: str) -> str:
+    # flite reads its text from a file, which avoids filtergraph escaping
+    text_path = os.path.splitext(path)[0] + ".txt"
+    with open(text_path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"flite=textfile={text_path}",
+            "-ar", str(transcription.SAMPLE_RATE), "-ac", "1", path,
+        ],
+        check=True,
+    )
+    return path
+
+
+def run_worker(backend_name: str, model: str, audio_path: str, threads: int) -> Dict:
+    import whisper
+
+    audio = whisper.load_audio(audio_path, sr=transcription.SAMPLE_RATE)
+    backend = transcription.create_backend(backend_name, model, threads)
+
+    started = time.perf_counter()
+    backend.load()
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    segments = backend.transcribe(audio)
+    elapsed = time.perf_counter() - started
+
+    duration = len(audio) / transcription.SAMPLE_RATE
+    return {
+        "backend": backend_name,
+        "model": model,
+        "load_seconds": load_seconds,
+        "transcribe_seconds": elapsed,
+        "audio_seconds": duration,
+        "real_time_factor": elapsed / duration if duration else None,
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "words": sum(len(segment["words"]) for segment in segments),
+        "text": " ".join(segment["text"] for segment in segments),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", help="local audio or video file")
+    parser.add_argument("--reference", help="text file with the true transcript")
+    parser.add_argument("--synthesize", action="store_true", help="make speech with flite")
+    parser.add_argument("--backends", default=",".join(transcription.BACKENDS))
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(run_worker(args.worker, args.model, args.audio, args.threads), sys.stdout)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        reference = None
+        audio_path = args.audio
+        if args.synthesize:
+            reference = " ".join(SENTENCES)
+            audio_path = synthesize(os.path.join(temp_dir, "speech.wav"), reference)
+        elif not audio_path:
+            parser.error("pass --audio or --synthesize")
+        if args.reference:
+            with open(args.reference, "r", encoding="utf-8") as handle:
+                reference = handle.read()
+
+        results = []
+        for backend in args.backends.split(","):
+            output = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.transcription",
+                    "--worker", backend,
+                    "--model", args.model,
+                    "--audio", audio_path,
+                    "--threads", str(args.threads),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if reference is None:
+        reference = results[0]["text"]
+        print(f"No reference transcript; WER is measured against {results[0]['backend']}")
+    for result in results:
+        result["wer"] = word_error_rate(reference, result["text"])
+        print(
+            f"{result['backend']:>15} ({result['model']}): RTF {result['real_time_factor']:.3f}  "
+            f"WER {result['wer']:6.1%}  load {result['load_seconds']:5.1f}s  "
+            f"peak RSS {result['peak_rss_mb']:7.1f} MB"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
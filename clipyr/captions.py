@@ -0,0 +1,162 @@
+"""Timed caption cues built from Whisper word timestamps.
+
+A clip's transcript is split into short phrases, each shown only while its
+words are spoken. The cues are ``(start, end, text)`` tuples in seconds from
+the clip start; the moviepy and ffmpeg render paths burn them in, and
+``write_srt`` exports them as a sidecar file.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+Cue = Tuple[float, float, str]
+
+EMOJI_MAP = {
+    "money": "💰",
+    "rich": "💰",
+    "dollar": "💵",
+    "love": "❤️",
+    "heart": "❤️",
+    "like": "👍",
+    "fire": "🔥",
+    "hot": "🔥",
+    "amazing": "🔥",
+    "laugh": "😂",
+    "funny": "😂",
+    "lol": "😂",
+    "wow": "😱",
+    "omg": "😱",
+    "shocking": "😱",
+    "cool": "😎",
+    "awesome": "😎",
+    "great": "😎",
+    "think": "🤔",
+    "question": "❓",
+    "why": "🤔",
+    "warning": "⚠️",
+    "careful": "⚠️",
+    "danger": "⚠️",
+    "success": "✅",
+    "win": "🏆",
+    "winner": "🏆",
+    "music": "🎵",
+    "song": "🎵",
+    "sound": "🔊",
+}
+_EMOJI_RE = re.compile(
+    r"\b(" + "|".join(sorted(map(re.escape, EMOJI_MAP), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+# A cue ends after this many words or characters, at sentence punctuation, or
+# at a pause in speech, whichever comes first
+MAX_CUE_WORDS = 4
+MAX_CUE_CHARS = 28
+MAX_CUE_GAP_SECONDS = 0.6
+# Short pauses are bridged so the caption doesn't flicker between cues
+MIN_CUE_SECONDS = 0.3
+_BREAK_AFTER = (".", "!", "?", ",", ";", ":")
+
+
+def add_emojis(text: str) -> str:
+    """Append the mapped emoji after every matching word, in a single pass."""
+    return _EMOJI_RE.sub(lambda m: f"{m.group(0)} {EMOJI_MAP[m.group(0).lower()]}", text)
+
+
+def _clip_words(segments: List[Dict], start: float, end: float) -> List[Dict]:
+    """Words inside ``start``-``end``, estimated evenly from segment spans where Whisper gave none."""
+    words: List[Dict] = []
+    for segment in segments:
+        timed = [w for w in segment.get("words", []) if w.get("word", "").strip()]
+        if not timed:
+            tokens = segment["text"].split()
+            if not tokens:
+                continue
+            step = (segment["end"] - segment["start"]) / len(tokens)
+            timed = [
+                {
+                    "word": token,
+                    "start": segment["start"] + k * step,
+                    "end": segment["start"] + (k + 1) * step,
+                }
+                for k, token in enumerate(tokens)
+            ]
+        for word in timed:
+            if word["end"] > start and word["start"] < end:
+                words.append(word)
+    return words
+
+
+def build_cues(
+    segments: List[Dict],
+    start: float,
+    end: float,
+    emojis: bool = True,
+    max_words: int = MAX_CUE_WORDS,
+    max_chars: int = MAX_CUE_CHARS,
+) -> List[Cue]:
+    """Group the words spoken between ``start`` and ``end`` into short timed cues."""
+    cues: List[Cue] = []
+    phrase: List[Dict] = []
+
+    def flush() -> None:
+        if not phrase:
+            return
+        text = " ".join(w["word"].strip() for w in phrase)
+        if emojis:
+            text = add_emojis(text)
+        cue_start = max(phrase[0]["start"], start) - start
+        cue_end = min(phrase[-1]["end"], end) - start
+        cues.append((cue_start, max(cue_end, cue_start + MIN_CUE_SECONDS), text))
+        phrase.clear()
+
+    for word in _clip_words(segments, start, end):
+        if phrase:
+            length = sum(len(w["word"].strip()) + 1 for w in phrase) + len(word["word"].strip())
+            if (
+                len(phrase) >= max_words
+                or length > max_chars
+                or word["start"] - phrase[-1]["end"] > MAX_CUE_GAP_SECONDS
+                or phrase[-1]["word"].strip().endswith(_BREAK_AFTER)
+            ):
+                flush()
+        phrase.append(word)
+    flush()
+
+    # Hold each cue until the next one starts when the gap is short
+    for k in range(len(cues) - 1):
+        cue_start, cue_end, text = cues[k]
+        next_start = cues[k + 1][0]
+        if next_start - cue_end <= MAX_CUE_GAP_SECONDS or cue_end > next_start:
+            cues[k] = (cue_start, next_start, text)
+    return cues
+
+
+def cues_from_text(text: str, duration: float, emojis: bool = True) -> List[Cue]:
+    """Cues for untimed text, spreading its words evenly over ``duration``."""
+    return build_cues(
+        [{"start": 0.0, "end": duration, "text": text}], 0.0, duration, emojis=emojis
+    )
+
+
+def shift_cues(cues: List[Cue], seconds: float) -> List[Cue]:
+    """Cues moved ``seconds`` later, e.g. when the clip starts earlier than planned."""
+    return [(start + seconds, end + seconds, text) for start, end, text in cues]
+
+
+def _srt_timestamp(seconds: float) -> str:
+    millis = max(0, int(round(seconds * 1000)))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def write_srt(cues: List[Cue], path: str) -> str:
+    blocks = [
+        f"{n}\n{_srt_timestamp(start)} --> {_srt_timestamp(end)}\n{text}\n"
+        for n, (start, end, text) in enumerate(cues, start=1)
+    ]
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(blocks))
+    return path
@@ -0,0 +1,132 @@
+"""Vertical clip rendering, kept apart from ``app`` for the render workers.
+
+Render workers import this module rather than ``app``, so they load moviepy
+and ffmpeg helpers only, never torch or the models.
+"""
+
+import os
+from typing import Dict, List
+
+import moviepy as mp
+
+import captions
+import ffmpeg_render
+
+
+def create_clip(
+    video_path: str,
+    start_time: float,
+    end_time: float,
+    text: str,
+    output_path: str,
+    add_subtitles: bool = True,
+    threads: int | None = None,
+    engine: str = "moviepy",
+    cues: List[captions.Cue] | None = None,
+) -> str:
+    """Render one vertical clip.
+
+    Needs no model state, so it can run inside a render worker process. The
+    temporary audio track sits next to ``output_path`` so concurrent renders
+    never share a file. ``engine="ffmpeg"`` renders the same layout with a
+    single ffmpeg filtergraph instead of moviepy compositing.
+
+    Captions are the timed ``cues`` (see ``captions.build_cues``); without
+    them, ``text`` is spread evenly over the clip.
+    """
+    if not add_subtitles:
+        cues = []
+    elif cues is None:
+        cues = captions.cues_from_text(text, end_time - start_time) if text else []
+
+    if engine == "ffmpeg":
+        return ffmpeg_render.render_clip(
+            video_path, start_time, end_time, cues, output_path, threads
+        )
+
+    print(f"Creating clip: {start_time:.1f}s - {end_time:.1f}s")
+    base_clip = mp.VideoFileClip(video_path)
+    segment_clip = None
+    background = None
+    video_resized = None
+    video_centered = None
+    base_composite = None
+    cue_clips: Dict[str, mp.TextClip] = {}
+    final_video = None
+    try:
+        segment_clip = base_clip.subclipped(start_time, end_time)
+
+        target_width = 1080
+        target_height = 1920
+
+        scale_w = target_width / segment_clip.w
+        scale_h = target_height / segment_clip.h
+        scale = min(scale_w, scale_h)
+        video_resized = segment_clip.resized(new_size=scale)
+
+        background = mp.ColorClip(
+            size=(target_width, target_height), color=(0, 0, 0)
+        ).with_duration(video_resized.duration)
+        video_centered = video_resized.with_position(("center", "center"))
+        base_composite = mp.CompositeVideoClip(
+            [background, video_centered], size=(target_width, target_height)
+        )
+
+        final_video = base_composite
+
+        if cues:
+            # One small text image per distinct phrase, reused for repeats;
+            # the composite only draws the cue active at each frame
+            layers = [final_video]
+            for cue_start, cue_end, cue_text in cues:
+                if cue_text not in cue_clips:
+                    cue_clips[cue_text] = mp.TextClip(
+                        text=cue_text,
+                        font_size=60,
+                        color="white",
+                        stroke_color="black",
+                        stroke_width=3,
+                        size=(target_width - 100, None),
+                        method="caption",
+                    ).with_position(("center", 0.8), relative=True)
+                cue_end = min(cue_end, final_video.duration)
+                if cue_end > cue_start:
+                    layers.append(
+                        cue_clips[cue_text]
+                        .with_start(cue_start)
+                        .with_duration(cue_end - cue_start)
+                    )
+            final_video = mp.CompositeVideoClip(
+                layers, size=(target_width, target_height)
+            )
+
+        final_video.write_videofile(
+            output_path,
+            codec="libx264",
+            audio_codec="aac",
+            temp_audiofile=f"{os.path.splitext(output_path)[0]}.audio.m4a",
+            remove_temp=True,
+            fps=30,
+            preset="ultrafast",
+            threads=threads,
+            ffmpeg_params=ffmpeg_render.FASTSTART_ARGS,
+        )
+    finally:
+        base_clip.close()
+        if segment_clip is not None:
+            segment_clip.close()
+        if background is not None:
+            background.close()
+        if video_resized is not None:
+            video_resized.close()
+        if video_centered is not None:
+            video_centered.close()
+        if base_composite is not None and base_composite is not final_video:
+            base_composite.close()
+        for cue_clip in cue_clips.values():
+            cue_clip.close()
+        if final_video is not None:
+            final_video.close()
+
+    return output_path
+
@@ -0,0 +1,412 @@
+"""Clip rendering and cutting done directly with ffmpeg.
+
+``render_clip`` produces the same 1080x1920 letterboxed output as the moviepy
+path in ``clip_render.create_clip``, but seeking, scaling, padding and
+caption burn-in all happen inside one ffmpeg filtergraph instead of per-frame
+Python compositing. ``fast_cut`` stream-copies a source range without
+transcoding for raw cuts.
+"""
+
+import json
+import os
+import subprocess
+from typing import Dict, List, Tuple
+
+TARGET_WIDTH = 1080
+TARGET_HEIGHT = 1920
+CAPTION_FONT_SIZE = 60
+# Captions start 80% of the way down the frame, matching the moviepy layout
+CAPTION_TOP = int(TARGET_HEIGHT * 0.8)
+CAPTION_SIDE_MARGIN = 50
+# Moves the moov atom to the front so players can start before the whole file arrives
+FASTSTART_ARGS = ["-movflags", "+faststart"]
+
+
+def _ass_timestamp(seconds: float) -> str:
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def _ass_text(text: str) -> str:
+    # Braces open override blocks in ASS; newlines use the \N escape
+    return text.replace("{", "(").replace("}", ")").replace("\n", "\\N")
+
+
+def write_ass_captions(cues: List[tuple], path: str) -> str:
+    """Write ``(start, end, text)`` cues as an ASS script styled like the moviepy captions."""
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {TARGET_WIDTH}",
+        f"PlayResY: {TARGET_HEIGHT}",
+        "WrapStyle: 0",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+        "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+        "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Default,DejaVu Sans,{CAPTION_FONT_SIZE},&H00FFFFFF,&H000000FF,&H00000000,"
+        f"&H00000000,0,0,0,0,100,100,0,0,1,3,0,8,{CAPTION_SIDE_MARGIN},"
+        f"{CAPTION_SIDE_MARGIN},{CAPTION_TOP},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for start, end, text in cues:
+        lines.append(
+            f"Dialogue: 0,{_ass_timestamp(start)},{_ass_timestamp(end)},Default,,0,0,0,,"
+            f"{_ass_text(text)}"
+        )
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(lines) + "\n")
+    return path
+
+
+def build_render_command(
+    video_path: str,
+    start_time: float,
+    end_time: float,
+    output_path: str,
+    subtitles_file: str | None = None,
+    threads: int | None = None,
+) -> List[str]:
+    """ffmpeg arguments for one letterboxed clip.
+
+    ``subtitles_file`` is a bare file name, resolved against the working
+    directory the command runs in, which avoids filtergraph path escaping.
+    """
+    filters = [
+        f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease"
+        ":force_divisible_by=2",
+        f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2:color=black",
+        "setsar=1",
+        "fps=30",
+    ]
+    if subtitles_file:
+        filters.append(f"subtitles={subtitles_file}")
+
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-ss",
+        f"{start_time:.3f}",
+        "-i",
+        os.path.abspath(video_path),
+        "-t",
+        f"{end_time - start_time:.3f}",
+        "-vf",
+        ",".join(filters),
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-pix_fmt",
+        "yuv420p",
+        "-c:a",
+        "aac",
+        *FASTSTART_ARGS,
+    ]
+    if threads:
+        command += ["-threads", str(threads)]
+    command.append(os.path.abspath(output_path))
+    return command
+
+
+def render_clip(
+    video_path: str,
+    start_time: float,
+    end_time: float,
+    cues: List[tuple],
+    output_path: str,
+    threads: int | None = None,
+) -> str:
+    """Render one vertical clip, burning in the timed ``(start, end, text)`` caption cues."""
+    print(f"Creating clip (ffmpeg): {start_time:.1f}s - {end_time:.1f}s")
+    work_dir = os.path.dirname(os.path.abspath(output_path))
+    subtitles_file = None
+    if cues:
+        subtitles_file = f"{os.path.splitext(os.path.basename(output_path))[0]}.ass"
+        write_ass_captions(cues, os.path.join(work_dir, subtitles_file))
+
+    command = build_render_command(
+        video_path, start_time, end_time, output_path, subtitles_file, threads
+    )
+    try:
+        _run_ffmpeg(command, "render clip", cwd=work_dir)
+    finally:
+        if subtitles_file:
+            try:
+                os.remove(os.path.join(work_dir, subtitles_file))
+            except OSError:
+                pass
+    return output_path
+
+
+def _run_ffmpeg(command: List[str], what: str, cwd: str | None = None) -> None:
+    try:
+        subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"ffmpeg failed to {what}: {exc.stderr.strip()[-500:]}") from exc
+
+
+def probe_streams(video_path: str) -> Dict[str, Dict]:
+    """First video and audio stream of a file, keyed ``"video"``/``"audio"`` when present."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-print_format", "json",
+            "-show_entries",
+            "stream=codec_type,codec_name,profile,level,pix_fmt,width,height,"
+            "r_frame_rate,avg_frame_rate,time_base,sample_rate,channels,duration"
+            ":format=duration",
+            video_path,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    data = json.loads(result.stdout)
+    streams: Dict[str, Dict] = {"format": data.get("format", {})}
+    for stream in data.get("streams", []):
+        streams.setdefault(stream.get("codec_type"), stream)
+    return streams
+
+
+def probe_keyframes(video_path: str, start: float, end: float) -> List[float]:
+    """Keyframe timestamps between ``start`` and ``end``.
+
+    Reads packet flags only, so nothing is decoded, and ``-read_intervals``
+    keeps ffprobe from walking the whole file.
+    """
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-read_intervals", f"{max(0.0, start):.3f}%{end:.3f}",
+            "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in {"", "N/A"}:
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+
+def _copy_command(video_path: str, start: float, end: float, output_path: str) -> List[str]:
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{start:.3f}", "-i", os.path.abspath(video_path),
+        "-t", f"{end - start:.3f}",
+        "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy",
+        "-avoid_negative_ts", "make_zero", *FASTSTART_ARGS,
+        os.path.abspath(output_path),
+    ]
+
+
+def _encode_command(
+    video_path: str, start: float, end: float, output_path: str, threads: int | None
+) -> List[str]:
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{start:.3f}", "-i", os.path.abspath(video_path),
+        "-t", f"{end - start:.3f}",
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-c:a", "aac",
+        *FASTSTART_ARGS,
+    ]
+    if threads:
+        command += ["-threads", str(threads)]
+    command.append(os.path.abspath(output_path))
+    return command
+
+
+# ffprobe H.264 profile names and the libx264 profiles that produce them
+_X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+
+
+def head_encode_args(video: Dict) -> List[str] | None:
+    """libx264 options for a head that can be joined to a stream copy of ``video``.
+
+    The head has to match the copied stream's profile, level, pixel format
+    and frame rate, or players stall or garble at the join. None when the
+    source can't be matched: another codec, a profile libx264 can't produce
+    at 8 bits, or a variable frame rate.
+    """
+    profile = _X264_PROFILES.get(video.get("profile", ""))
+    level = video.get("level")
+    rate = video.get("r_frame_rate")
+    if (
+        video.get("codec_name") != "h264"
+        or profile is None
+        or video.get("pix_fmt") != "yuv420p"
+        or not isinstance(level, int)
+        or level <= 0
+        or not rate
+        or rate in {"0/0", "0/1"}
+        or rate != video.get("avg_frame_rate")
+    ):
+        return None
+    return [
+        "-c:v", "libx264", "-preset", "ultrafast",
+        "-profile:v", profile, "-level:v", f"{level / 10:g}",
+        "-pix_fmt", "yuv420p", "-r", rate,
+    ]
+
+
+def _joined_cut_ok(output_path: str, source: Dict[str, Dict], duration: float) -> bool:
+    """Whether a head+tail cut came out with the expected duration and streams."""
+    try:
+        result = probe_streams(output_path)
+    except (subprocess.CalledProcessError, ValueError):
+        return False
+    video, audio = result.get("video"), result.get("audio")
+    if video is None or ("audio" in source) != (audio is not None):
+        return False
+    if any(video.get(key) != source["video"].get(key) for key in ("width", "height", "pix_fmt")):
+        return False
+    try:
+        total = float(result["format"]["duration"])
+        video_duration = float(video.get("duration", total))
+        audio_duration = float(audio.get("duration", total)) if audio else video_duration
+    except (KeyError, ValueError):
+        return False
+    # A frame or two of slack for the encoder; more means a broken join or drift
+    return abs(total - duration) <= 0.25 and abs(video_duration - audio_duration) <= 0.15
+
+
+def fast_cut(
+    video_path: str,
+    start_time: float,
+    end_time: float,
+    output_path: str,
+    earliest_start: float | None = None,
+    threads: int | None = None,
+) -> Tuple[str, float]:
+    """Cut ``start_time``-``end_time`` out of the source, transcoding as little as possible.
+
+    Returns the output path and the source time the cut actually starts at,
+    which is earlier than ``start_time`` when the start snapped to a keyframe.
+
+    If a keyframe lies between ``earliest_start`` and ``start_time`` (the caller
+    passes the end of the previous spoken segment, so only silence is added),
+    the start snaps back to it and the whole range is stream-copied. Otherwise
+    only the video head up to the next keyframe is re-encoded, with the
+    source's H.264 parameters, for a frame-accurate start. The rest of the
+    video is stream-copied behind it, and the audio is re-encoded across the
+    whole clip so there is no audio seam to drift. Sources whose parameters
+    can't be matched, and joins that don't probe as expected, fall back to
+    re-encoding the whole range.
+    """
+    print(f"Cutting clip (stream copy): {start_time:.1f}s - {end_time:.1f}s")
+    if earliest_start is None:
+        earliest_start = start_time
+    earliest_start = min(earliest_start, start_time)
+    keyframes = probe_keyframes(video_path, earliest_start - 0.5, end_time)
+
+    snap = [k for k in keyframes if earliest_start - 1e-3 <= k <= start_time + 1e-3]
+    if snap:
+        _run_ffmpeg(_copy_command(video_path, snap[-1], end_time, output_path), "cut clip")
+        return output_path, snap[-1]
+
+    following = [k for k in keyframes if start_time < k < end_time]
+    source = probe_streams(video_path) if following else {}
+    head_args = head_encode_args(source["video"]) if "video" in source else None
+    joined = False
+    if head_args is not None:
+        try:
+            joined = _join_cut(
+                video_path, start_time, end_time, following[0], output_path, source, head_args,
+                threads,
+            )
+        except RuntimeError as exc:
+            print(f"Joined cut failed ({exc}); re-encoding the whole clip")
+    if not joined:
+        # No keyframe inside the clip, or a head that can't be joined to the copy
+        _run_ffmpeg(
+            _encode_command(video_path, start_time, end_time, output_path, threads), "cut clip"
+        )
+    return output_path, start_time
+
+
+def _join_cut(
+    video_path: str,
+    start_time: float,
+    end_time: float,
+    keyframe: float,
+    output_path: str,
+    source: Dict[str, Dict],
+    head_args: List[str],
+    threads: int | None,
+) -> bool:
+    """Encoded head + copied tail; False (nothing left behind) if the result is off."""
+    base = os.path.splitext(os.path.abspath(output_path))[0]
+    # MPEG-TS carries SPS/PPS in band, so the tail's own parameter sets survive
+    # the join, and its 90 kHz clock sidesteps mismatched MP4 timescales
+    head_path, tail_path, list_path = f"{base}.head.ts", f"{base}.tail.ts", f"{base}.txt"
+    source_path = os.path.abspath(video_path)
+    try:
+        head = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-ss", f"{start_time:.3f}", "-i", source_path,
+            "-t", f"{keyframe - start_time:.3f}",
+            "-map", "0:v:0", "-an", *head_args,
+        ]
+        if threads:
+            head += ["-threads", str(threads)]
+        _run_ffmpeg(head + [head_path], "encode clip head")
+        _run_ffmpeg(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-ss", f"{keyframe:.3f}", "-i", source_path,
+                "-t", f"{end_time - keyframe:.3f}",
+                "-map", "0:v:0", "-an", "-c:v", "copy", "-bsf:v", "h264_mp4toannexb",
+                tail_path,
+            ],
+            "cut clip",
+        )
+        with open(list_path, "w", encoding="utf-8") as handle:
+            handle.write(f"file '{os.path.basename(head_path)}'\n")
+            handle.write(f"file '{os.path.basename(tail_path)}'\n")
+        join = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", os.path.basename(list_path),
+        ]
+        if "audio" in source:
+            audio = source["audio"]
+            join += [
+                "-ss", f"{start_time:.3f}", "-t", f"{end_time - start_time:.3f}",
+                "-i", source_path,
+                "-map", "0:v:0", "-map", "1:a:0",
+                "-c:a", "aac", "-ar", str(audio.get("sample_rate", 48000)),
+                "-ac", str(audio.get("channels", 2)),
+            ]
+        join += ["-c:v", "copy", *FASTSTART_ARGS, os.path.abspath(output_path)]
+        _run_ffmpeg(join, "join clip", cwd=os.path.dirname(list_path))
+    finally:
+        for path in (head_path, tail_path, list_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    if _joined_cut_ok(output_path, source, end_time - start_time):
+        return True
+    print("Joined cut did not probe as expected; re-encoding the whole clip")
+    try:
+        os.remove(output_path)
+    except OSError:
+        pass
+    return False
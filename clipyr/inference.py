@@ -0,0 +1,31 @@
+"""Loading the transformer text classifiers used for virality scoring."""
+
+import torch
+from transformers import pipeline
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+
+# "fp32" keeps the stock weights; "int8" dynamically quantizes every Linear layer,
+# which is where almost all of the CPU time of these encoders goes
+PRECISIONS = ("fp32", "int8")
+
+
+def _load_classifier(task: str, model: str, precision: str):
+    classifier = pipeline(task, model=model)
+    if precision == "int8":
+        classifier.model = torch.quantization.quantize_dynamic(
+            classifier.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    classifier.model.eval()
+    return classifier
+
+
+def load_text_classifiers(precision: str = "fp32"):
+    """Return the ``(sentiment, emotion)`` pipelines at the requested precision."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported inference precision: {precision}")
+    return (
+        _load_classifier("sentiment-analysis", SENTIMENT_MODEL, precision),
+        _load_classifier("text-classification", EMOTION_MODEL, precision),
+    )
@@ -0,0 +1,347 @@
+"""Persistent job index shared by every server worker.
+
+Jobs and their finished clips live in one SQLite database in WAL mode, so
+readers never block the job thread writing progress. Any worker can answer
+for any job, and finished jobs survive a restart. Each thread opens its own
+connection, and so does a process forked after the store was created.
+
+Timestamps go in and out as naive UTC ``datetime`` objects (what the app
+uses) and are stored as epoch seconds.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    status_message TEXT,
+    error TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    created REAL NOT NULL,
+    finished REAL,
+    expires_at REAL,
+    worker TEXT,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    last_access REAL,
+    metrics TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+CREATE INDEX IF NOT EXISTS jobs_lru ON jobs (COALESCE(last_access, finished))
+    WHERE finished IS NOT NULL;
+CREATE TABLE IF NOT EXISTS clips (
+    job_id TEXT NOT NULL REFERENCES jobs (job_id) ON DELETE CASCADE,
+    file_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    info TEXT NOT NULL,
+    PRIMARY KEY (job_id, file_name)
+);
+CREATE TABLE IF NOT EXISTS storage_usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO storage_usage (id, bytes) VALUES (0, 0);
+CREATE TABLE IF NOT EXISTS stage_buckets (
+    stage TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (stage, metric, bucket)
+);
+CREATE TABLE IF NOT EXISTS stage_totals (
+    stage TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    PRIMARY KEY (stage, metric)
+);
+"""
+# Columns ``update`` may set directly; "finished" also sets the expiry
+_UPDATABLE = {"status", "stage", "status_message", "error", "metadata", "metrics", "finished"}
+
+
+def _to_epoch(value: datetime | None) -> float | None:
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _from_epoch(value: float | None) -> datetime | None:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def _process_token(pid: int) -> str | None:
+    """``pid:start-time`` for a live process, so a recycled pid (e.g. after a
+    container restart) doesn't pass for the worker that owned a job."""
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as handle:
+            stat = handle.read()
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return None
+        except PermissionError:
+            pass
+        return f"{pid}:"
+    # The command name may contain spaces; fields after it are space separated
+    return f"{pid}:{stat.rpartition(')')[2].split()[19]}"
+
+
+def _worker_alive(worker: str | None) -> bool:
+    if not worker:
+        return False
+    pid, _, _ = worker.partition(":")
+    return _process_token(int(pid)) == worker
+
+
+class JobStore:
+    def __init__(self, path: Path, ttl_seconds: int) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection must not cross a fork; the child opens its own
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def register(self, job_id: str, directory: Path, metadata: Dict, status: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, dir, status, metadata, created, worker) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    str(directory),
+                    status,
+                    json.dumps(metadata),
+                    _to_epoch(datetime.utcnow()),
+                    _process_token(os.getpid()),
+                ),
+            )
+
+    def update(self, job_id: str, **fields) -> None:
+        unknown = set(fields) - _UPDATABLE
+        if unknown:
+            raise ValueError(f"Cannot update job fields: {sorted(unknown)}")
+        values = dict(fields)
+        for column in ("metadata", "metrics"):
+            if column in values:
+                values[column] = json.dumps(values[column])
+        if "finished" in values:
+            finished = _to_epoch(values["finished"])
+            values["finished"] = finished
+            values["expires_at"] = None if finished is None else finished + self.ttl_seconds
+        if not values:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*values.values(), job_id)
+            )
+
+    def add_clip(self, job_id: str, clip: Dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO clips (job_id, file_name, position, size_bytes, info) "
+                "VALUES (?, ?, (SELECT COUNT(*) FROM clips WHERE job_id = ?), ?, ?)",
+                (
+                    job_id,
+                    clip["file_name"],
+                    job_id,
+                    int(clip.get("size_bytes", 0)),
+                    json.dumps(clip),
+                ),
+            )
+
+    def clear_clips(self, job_id: str) -> None:
+        """Forget a job's clips and the bytes they were charged for."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM clips WHERE job_id = ?", (job_id,))
+            self._release_bytes(conn, [job_id])
+            conn.execute("UPDATE jobs SET size_bytes = 0 WHERE job_id = ?", (job_id,))
+
+    def add_bytes(self, job_id: str, size: int) -> int:
+        """Charge ``size`` bytes to a job and return the total usage afterwards."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET size_bytes = size_bytes + ? WHERE job_id = ?", (size, job_id)
+            )
+            conn.execute("UPDATE storage_usage SET bytes = bytes + ? WHERE id = 0", (size,))
+            return conn.execute("SELECT bytes FROM storage_usage WHERE id = 0").fetchone()[0]
+
+    def usage_bytes(self) -> int:
+        return self._connect().execute(
+            "SELECT bytes FROM storage_usage WHERE id = 0"
+        ).fetchone()[0]
+
+    def recount_usage(self) -> int:
+        """Reset the usage counter from the per-job sizes, in case it drifted."""
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM jobs").fetchone()[0]
+            conn.execute("UPDATE storage_usage SET bytes = ? WHERE id = 0", (total,))
+        return total
+
+    def touch(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET last_access = ? WHERE job_id = ?",
+                (_to_epoch(datetime.utcnow()), job_id),
+            )
+
+    def least_recently_used(self, limit: int) -> List[str]:
+        """Finished jobs, least recently downloaded first (never-downloaded ones by finish time)."""
+        rows = self._connect().execute(
+            "SELECT job_id FROM jobs WHERE finished IS NOT NULL "
+            "ORDER BY COALESCE(last_access, finished) LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def job_ids(self) -> set:
+        return {row["job_id"] for row in self._connect().execute("SELECT job_id FROM jobs")}
+
+    @staticmethod
+    def _release_bytes(conn: sqlite3.Connection, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" for _ in job_ids)
+        conn.execute(
+            "UPDATE storage_usage SET bytes = bytes - ("
+            f"SELECT COALESCE(SUM(size_bytes), 0) FROM jobs WHERE job_id IN ({placeholders})"
+            ") WHERE id = 0",
+            job_ids,
+        )
+
+    def get(self, job_id: str) -> Dict | None:
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        clips = conn.execute(
+            "SELECT info FROM clips WHERE job_id = ? ORDER BY position", (job_id,)
+        ).fetchall()
+        return {
+            "dir": Path(row["dir"]),
+            "created": _from_epoch(row["created"]),
+            "finished": _from_epoch(row["finished"]),
+            "metadata": json.loads(row["metadata"]),
+            "metrics": json.loads(row["metrics"]),
+            "status": row["status"],
+            "stage": row["stage"],
+            "status_message": row["status_message"],
+            "error": row["error"],
+            "clips": [json.loads(clip["info"]) for clip in clips],
+        }
+
+    def exists(self, job_id: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return row is not None
+
+    def remove(self, job_id: str) -> Path | None:
+        """Delete a job's record, returning its directory if it existed."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT dir FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            self._release_bytes(conn, [job_id])
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        return Path(row["dir"])
+
+    def pop_expired(self, now: datetime) -> List[Path]:
+        """Delete every job past its expiry (one range scan of the index) and return their dirs."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, dir FROM jobs WHERE expires_at <= ?", (_to_epoch(now),)
+            ).fetchall()
+            self._release_bytes(conn, [row["job_id"] for row in rows])
+            conn.executemany(
+                "DELETE FROM jobs WHERE job_id = ?", [(row["job_id"],) for row in rows]
+            )
+        return [Path(row["dir"]) for row in rows]
+
+    def fail_orphaned(
+        self, statuses: Tuple[str, ...], failed_status: str, error: str
+    ) -> List[Path]:
+        """Fail unfinished jobs whose worker process is gone, e.g. after a restart.
+
+        Their clips are forgotten and their bytes released; the directories are
+        returned for the caller to delete.
+        """
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = conn.execute(
+            f"SELECT job_id, dir, worker FROM jobs WHERE status IN ({placeholders})", statuses
+        ).fetchall()
+        orphaned = [row for row in rows if not _worker_alive(row["worker"])]
+        for row in orphaned:
+            self.clear_clips(row["job_id"])
+            self.update(
+                row["job_id"], status=failed_status, error=error, finished=datetime.utcnow()
+            )
+        return [Path(row["dir"]) for row in orphaned]
+
+    def observe(self, stage: str, buckets: Dict[str, int], values: Dict[str, float]) -> None:
+        """Add one observation per metric to the shared stage histograms.
+
+        ``buckets`` gives the bucket index each metric's value falls in.
+        """
+        with self._connect() as conn:
+            for metric, value in values.items():
+                conn.execute(
+                    "INSERT INTO stage_buckets (stage, metric, bucket, count) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (stage, metric, bucket) DO UPDATE SET count = count + 1",
+                    (stage, metric, buckets[metric]),
+                )
+                conn.execute(
+                    "INSERT INTO stage_totals (stage, metric, count, sum) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT (stage, metric) DO UPDATE "
+                    "SET count = count + 1, sum = sum + excluded.sum",
+                    (stage, metric, value),
+                )
+
+    def histograms(
+        self,
+    ) -> Tuple[Dict[Tuple[str, str], Dict[int, int]], Dict[Tuple[str, str], Tuple[int, float]]]:
+        conn = self._connect()
+        buckets: Dict[Tuple[str, str], Dict[int, int]] = {}
+        for row in conn.execute("SELECT stage, metric, bucket, count FROM stage_buckets"):
+            buckets.setdefault((row["stage"], row["metric"]), {})[row["bucket"]] = row["count"]
+        totals = {
+            (row["stage"], row["metric"]): (row["count"], row["sum"])
+            for row in conn.execute("SELECT stage, metric, count, sum FROM stage_totals")
+        }
+        return buckets, totals
+
+    def counts(self, active_statuses: Tuple[str, ...]) -> Tuple[int, int]:
+        """Total number of jobs and how many of them are in ``active_statuses``."""
+        placeholders = ", ".join("?" for _ in active_statuses)
+        row = self._connect().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(status IN ({placeholders})), 0) FROM jobs",
+            active_statuses,
+        ).fetchone()
+        return row[0], row[1]
@@ -0,0 +1,216 @@
+"""Per-stage timing and resource measurements for clip jobs.
+
+Each pipeline stage of a job is measured as a ``StageRecord``:
+
+- wall time;
+- CPU time of this process plus any child processes it waited for (ffmpeg);
+- peak RSS while the stage ran;
+- the duration of media it processed;
+- the real-time factor (wall time per second of media).
+
+CPU time and peak RSS are process-wide, so stages of concurrent jobs in the
+same worker show up in each other's numbers. Renders are measured inside the
+render worker process that ran them (see ``timed_call``), which is
+dedicated to one clip at a time. ``profiled_call`` also runs cProfile there and
+dumps the stats to a file, for the job to merge into its own profile.
+
+Peak RSS is read from ``VmHWM`` after resetting it through
+``/proc/self/clear_refs``. Where that is unavailable it falls back to the
+lifetime peak from ``getrusage``.
+
+Records are also summarised as Prometheus histograms (``render_prometheus``).
+"""
+
+import cProfile
+import resource
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Upper bounds of the histogram buckets for each recorded quantity
+HISTOGRAM_BUCKETS: Dict[str, Tuple[float, ...]] = {
+    "wall_seconds": (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+    "cpu_seconds": (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+    "peak_rss_bytes": tuple(float(2**k * 1024**2) for k in range(7, 15)),
+    "real_time_factor": (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+}
+_HISTOGRAM_HELP = {
+    "wall_seconds": "Wall-clock time spent in a pipeline stage",
+    "cpu_seconds": "CPU time (including waited-for child processes) spent in a pipeline stage",
+    "peak_rss_bytes": "Peak resident set size while a pipeline stage ran",
+    "real_time_factor": "Stage wall time per second of processed media",
+}
+
+
+def _cpu_seconds() -> float:
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as handle:
+            handle.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes(reset: bool) -> int:
+    if reset:
+        try:
+            with open("/proc/self/status", "r", encoding="ascii") as handle:
+                for line in handle:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageRecord:
+    def __init__(self, stage: str, input_seconds: float | None = None) -> None:
+        self.stage = stage
+        # Seconds of media the stage processed; may be set once it is known
+        self.input_seconds = input_seconds
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes = 0
+
+    @property
+    def real_time_factor(self) -> float | None:
+        if not self.input_seconds:
+            return None
+        return self.wall_seconds / self.input_seconds
+
+    def as_dict(self) -> Dict:
+        return {
+            "stage": self.stage,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "input_seconds": self.input_seconds,
+            "real_time_factor": (
+                None if self.real_time_factor is None else round(self.real_time_factor, 4)
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "StageRecord":
+        record = cls(data["stage"], data.get("input_seconds"))
+        record.wall_seconds = data["wall_seconds"]
+        record.cpu_seconds = data["cpu_seconds"]
+        record.peak_rss_bytes = data["peak_rss_bytes"]
+        return record
+
+    def histogram_values(self) -> Dict[str, float]:
+        values = {
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "peak_rss_bytes": float(self.peak_rss_bytes),
+        }
+        if self.real_time_factor is not None:
+            values["real_time_factor"] = self.real_time_factor
+        return values
+
+
+@contextmanager
+def measure(stage: str, input_seconds: float | None = None) -> Iterator[StageRecord]:
+    record = StageRecord(stage, input_seconds)
+    reset = _reset_peak_rss()
+    cpu_before = _cpu_seconds()
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.wall_seconds = time.perf_counter() - started
+        record.cpu_seconds = _cpu_seconds() - cpu_before
+        record.peak_rss_bytes = _peak_rss_bytes(reset)
+
+
+def timed_call(
+    func: Callable, stage: str, input_seconds: float | None, /, **kwargs
+) -> Tuple[object, Dict]:
+    """Run ``func(**kwargs)`` and return its result with the stage record as a dict.
+
+    Picklable, so it can be submitted to a process pool and measure the work
+    inside the worker.
+    """
+    with measure(stage, input_seconds) as record:
+        result = func(**kwargs)
+    return result, record.as_dict()
+
+
+def profiled_call(
+    profile_path: str, func: Callable, stage: str, input_seconds: float | None, /, **kwargs
+) -> Tuple[object, Dict]:
+    """``timed_call`` under cProfile, with the stats dumped to ``profile_path``."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return timed_call(func, stage, input_seconds, **kwargs)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+
+
+class JobMetrics:
+    """Stage records of one job; ``on_record`` is called as each stage finishes."""
+
+    def __init__(self, on_record: Callable[["JobMetrics", StageRecord], None] | None = None):
+        self.records: List[StageRecord] = []
+        self.on_record = on_record
+
+    @contextmanager
+    def stage(self, stage: str, input_seconds: float | None = None) -> Iterator[StageRecord]:
+        with measure(stage, input_seconds) as record:
+            yield record
+        self.add(record)
+
+    def add(self, record: StageRecord) -> None:
+        self.records.append(record)
+        if self.on_record is not None:
+            self.on_record(self, record)
+
+    def as_list(self) -> List[Dict]:
+        return [record.as_dict() for record in self.records]
+
+
+def bucket_index(metric: str, value: float) -> int:
+    """Index of the bucket ``value`` falls in; ``len(bounds)`` is the +Inf bucket."""
+    return bisect_left(HISTOGRAM_BUCKETS[metric], value)
+
+
+def _format_bound(bound: float) -> str:
+    return f"{bound:g}" if bound < 1e6 else f"{bound:.0f}"
+
+
+def render_prometheus(
+    buckets: Dict[Tuple[str, str], Dict[int, int]],
+    totals: Dict[Tuple[str, str], Tuple[int, float]],
+) -> str:
+    """Prometheus text exposition of the stage histograms.
+
+    ``buckets`` maps ``(stage, metric)`` to per-bucket (non-cumulative)
+    counts, and ``totals`` maps it to the observation count and sum.
+    """
+    lines: List[str] = []
+    for metric, bounds in HISTOGRAM_BUCKETS.items():
+        name = f"clipper_stage_{metric}"
+        lines.append(f"# HELP {name} {_HISTOGRAM_HELP[metric]}")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, _ in sorted(key for key in totals if key[1] == metric):
+            counts = buckets.get((stage, metric), {})
+            cumulative = 0
+            for index, bound in enumerate(bounds):
+                cumulative += counts.get(index, 0)
+                lines.append(
+                    f'{name}_bucket{{stage="{stage}",le="{_format_bound(bound)}"}} {cumulative}'
+                )
+            count, total = totals[(stage, metric)]
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+    return "\n".join(lines) + "\n"
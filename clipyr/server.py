@@ -0,0 +1,125 @@
+"""Pre-fork server: load the models once, then fork workers that share them.
+
+    CLIPPER_WORKERS=4 python server.py
+
+The parent imports ``app`` (loading Whisper and both classifiers), binds the
+listening socket and forks ``CLIPPER_WORKERS`` uvicorn workers. The workers
+share the model weights copy-on-write instead of each loading their own copy.
+Each worker gets an explicit torch thread budget (``CLIPPER_TORCH_THREADS``,
+by default cores divided by workers) so the workers together don't
+oversubscribe the CPU. The budget is exported for faster-whisper too, whose
+model is built in the parent with its thread count fixed. Workers that die
+are restarted.
+"""
+
+import gc
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import Dict
+
+
+def _thread_budget(workers: int) -> int:
+    configured = os.environ.get("CLIPPER_TORCH_THREADS")
+    if configured:
+        return max(1, int(configured))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _serve(application, sock: socket.socket | None, threads: int) -> None:
+    import torch
+    import uvicorn
+
+    torch.set_num_threads(threads)
+    config = uvicorn.Config(
+        application,
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "7860")),
+        reload=False,
+    )
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock] if sock is not None else None)
+
+
+def main() -> None:
+    workers = max(1, int(os.environ.get("CLIPPER_WORKERS", "1")))
+    threads = _thread_budget(workers)
+    # Read by app for engines that fix their thread count when the model loads,
+    # which happens here in the parent, before the workers set theirs
+    os.environ["CLIPPER_TORCH_THREADS"] = str(threads)
+
+    if workers == 1:
+        import app as clipper_app
+
+        _serve(clipper_app.app, None, threads)
+        return
+
+    import torch
+
+    # Keep the parent single-threaded while it loads the models, so no OpenMP
+    # thread pool exists yet when the workers fork
+    torch.set_num_threads(1)
+    import app as clipper_app
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((os.environ.get("HOST", "0.0.0.0"), int(os.environ.get("PORT", "7860"))))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Park everything loaded so far in the permanent GC generation, so garbage
+    # collections in the workers don't write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                _serve(clipper_app.app, sock, threads)
+            except BaseException:  # pragma: no cover - reported, then the parent restarts us
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        children[pid] = slot
+
+    def stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+    print(f"Started {workers} workers with {threads} torch thread(s) each")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {status}; restarting")
+        time.sleep(1)
+        spawn(slot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""A counting semaphore shared by every process on the machine.
+
+Each of the ``size`` slots is a lock file under ``directory``; holding a slot
+means holding an exclusive ``flock`` on its file. The kernel drops the lock
+when the holder's file is closed, including when the process dies, so a
+crashed worker cannot leak slots the way a shared semaphore would.
+"""
+
+import fcntl
+import os
+import time
+from pathlib import Path
+
+
+class SlotPool:
+    def __init__(self, directory: Path, size: int, poll_seconds: float = 0.05) -> None:
+        self.directory = Path(directory)
+        self.size = size
+        self.poll_seconds = poll_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def try_acquire(self) -> int | None:
+        """Take a free slot without waiting; returns a handle for ``release``, or None."""
+        for slot in range(self.size):
+            fd = os.open(self.directory / f"slot_{slot}", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            return fd
+        return None
+
+    def acquire(self) -> int:
+        while (fd := self.try_acquire()) is None:
+            time.sleep(self.poll_seconds)
+        return fd
+
+    @staticmethod
+    def release(fd: int) -> None:
+        # Closing the descriptor drops the lock
+        os.close(fd)
+
@@ -0,0 +1,101 @@
+"""Byte budget for the job storage directory.
+
+Every file a job publishes is charged to the job store's usage counter as it
+is written, so the total is known without walking the disk. Once the total
+goes over ``quota_bytes``, finished jobs are evicted, least recently
+downloaded first. On startup, jobs interrupted by a crash are failed and their
+directories deleted, and directories without a job record are reclaimed.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from jobstore import JobStore
+
+# Jobs looked at per eviction round
+_EVICTION_BATCH = 16
+
+
+class StorageManager:
+    def __init__(
+        self,
+        root: Path,
+        store: JobStore,
+        quota_bytes: int,
+        orphan_grace_seconds: float = 600.0,
+    ) -> None:
+        self.root = Path(root)
+        self.store = store
+        # 0 disables the quota
+        self.quota_bytes = quota_bytes
+        # A directory is created a moment before its job is registered, possibly
+        # by another worker, so only directories older than this are orphans
+        self.orphan_grace_seconds = orphan_grace_seconds
+
+    def record(self, job_id: str, paths: Iterable[Path | str]) -> None:
+        """Charge newly written files to ``job_id``, evicting old jobs if over quota."""
+        size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        used = self.store.add_bytes(job_id, size)
+        if self.quota_bytes and used > self.quota_bytes:
+            self.enforce_quota()
+
+    def enforce_quota(self) -> int:
+        """Evict finished jobs until usage fits the quota; returns how many were removed.
+
+        Queued and running jobs are never evicted, so usage can stay above the
+        quota while only they hold data.
+        """
+        removed = 0
+        while self.quota_bytes and self.store.usage_bytes() > self.quota_bytes:
+            candidates = self.store.least_recently_used(_EVICTION_BATCH)
+            if not candidates:
+                break
+            for job_id in candidates:
+                directory = self.store.remove(job_id)
+                if directory is not None:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    removed += 1
+                if self.store.usage_bytes() <= self.quota_bytes:
+                    break
+        if removed:
+            print(f"Evicted {removed} job(s) to stay within the storage quota")
+        return removed
+
+    def fail_interrupted(self, statuses: Tuple[str, ...], failed_status: str, error: str) -> int:
+        """Fail jobs whose worker died and delete whatever they had written."""
+        directories = self.store.fail_orphaned(statuses, failed_status, error)
+        for directory in directories:
+            shutil.rmtree(directory, ignore_errors=True)
+        return len(directories)
+
+    def reclaim_orphans(self) -> int:
+        """Delete job directories that no job record points to."""
+        known = self.store.job_ids()
+        cutoff = time.time() - self.orphan_grace_seconds
+        reclaimed = 0
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name in known:
+                continue
+            try:
+                if entry.stat().st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            reclaimed += 1
+        self.store.recount_usage()
+        if reclaimed:
+            print(f"Reclaimed {reclaimed} orphaned job director{'y' if reclaimed == 1 else 'ies'}")
+        return reclaimed
+
+    def stats(self) -> Dict[str, int]:
+        disk = shutil.disk_usage(self.root)
+        return {
+            "used_bytes": self.store.usage_bytes(),
+            "quota_bytes": self.quota_bytes,
+            "disk_free_bytes": disk.free,
+            "disk_total_bytes": disk.total,
+        }
@@ -0,0 +1,51 @@
+"""Shared test setup.
+
+The service modules are imported by their top-level names, as ``server.py``
+does, so the ``clipyr`` directory goes on ``sys.path``. Everything ``app``
+writes at import time is pointed at a throwaway directory, and models are
+only loaded when a test asks for them.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_STATE_DIR = tempfile.mkdtemp(prefix="clipper_tests_")
+os.environ.setdefault("CLIPPER_PRELOAD_MODELS", "0")
+os.environ.setdefault("CLIPPER_STORAGE_DIR", os.path.join(_STATE_DIR, "clips"))
+os.environ.setdefault("CLIPPER_UPLOAD_DIR", os.path.join(_STATE_DIR, "uploads"))
+os.environ.setdefault("CLIPPER_ANALYSIS_CACHE_DIR", os.path.join(_STATE_DIR, "analysis"))
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    shutil.rmtree(_STATE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def ffmpeg() -> None:
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        pytest.skip("ffmpeg is not installed")
+
+
+@pytest.fixture(scope="session")
+def source_video(ffmpeg, tmp_path_factory) -> str:
+    """30 s H.264/AAC test pattern with a tone, two-second GOPs."""
+    path = str(tmp_path_factory.mktemp("media") / "source.mp4")
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=size=640x360:rate=30:duration=30",
+            "-f", "lavfi", "-i", "sine=frequency=440:duration=30",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "60",
+            "-c:a", "aac", "-shortest", path,
+        ],
+        check=True,
+    )
+    return path
+
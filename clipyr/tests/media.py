@@ -0,0 +1,26 @@
+"""ffprobe helpers for tests that check rendered media."""
+
+import json
+import subprocess
+from typing import Dict, List
+
+
+def probe(path: str) -> Dict:
+    output = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-print_format", "json",
+            "-show_format", "-show_streams", path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def duration(path: str) -> float:
+    return float(probe(path)["format"]["duration"])
+
+
+def codecs(path: str) -> List[str]:
+    return sorted(stream["codec_name"] for stream in probe(path)["streams"])
@@ -0,0 +1,44 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+app = pytest.importorskip("app")
+
+
+def _files(tmp_path):
+    clip = tmp_path / "clip_1.mp4"
+    # Larger than one read block, so the entry is written in several pieces
+    clip.write_bytes(bytes(range(256)) * (5 * 1024 * 4 + 3))
+    captions = tmp_path / "clip_1.srt"
+    captions.write_text("1\n00:00:00,000 --> 00:00:01,000\nHello\n", encoding="utf-8")
+    return [("clip_1.mp4", clip), ("clip_1.srt", captions)]
+
+
+def test_streamed_archive_round_trips(tmp_path):
+    files = _files(tmp_path)
+    manifest = {"job_id": "job", "clips": [{"file_name": "clip_1.mp4"}]}
+
+    data = b"".join(app._stream_zip(manifest, files))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["manifest.json", "clip_1.mp4", "clip_1.srt"]
+        assert json.loads(archive.read("manifest.json")) == manifest
+        for name, path in files:
+            info = archive.getinfo(name)
+            assert info.compress_type == zipfile.ZIP_STORED
+            assert archive.read(name) == path.read_bytes()
+
+
+def test_archive_is_yielded_while_files_are_read(tmp_path):
+    files = _files(tmp_path)
+    stream = app._stream_zip({"job_id": "job"}, files)
+
+    # The manifest goes out before any clip is opened
+    first = next(stream)
+    assert first.startswith(b"PK\x03\x04")
+    chunks = [first, *stream]
+    assert len(chunks) > 3
+    assert max(len(chunk) for chunk in chunks) <= 1024 * 1024 + 1024
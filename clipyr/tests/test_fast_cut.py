@@ -0,0 +1,61 @@
+import pytest
+
+import ffmpeg_render
+import media
+
+SOURCE_VIDEO = {
+    "codec_name": "h264",
+    "profile": "High",
+    "level": 31,
+    "pix_fmt": "yuv420p",
+    "r_frame_rate": "30/1",
+    "avg_frame_rate": "30/1",
+}
+
+
+def test_head_matches_source_parameters():
+    args = ffmpeg_render.head_encode_args(SOURCE_VIDEO)
+    options = dict(zip(args[::2], args[1::2]))
+    assert options["-c:v"] == "libx264"
+    assert options["-profile:v"] == "high"
+    assert options["-level:v"] == "3.1"
+    assert options["-pix_fmt"] == "yuv420p"
+    assert options["-r"] == "30/1"
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"codec_name": "hevc"},
+        {"profile": "High 10"},
+        {"pix_fmt": "yuv420p10le"},
+        {"avg_frame_rate": "2997/100"},
+        {"level": -99},
+    ],
+    ids=["codec", "profile", "pix-fmt", "variable-rate", "level"],
+)
+def test_unmatchable_sources_get_no_head(change):
+    assert ffmpeg_render.head_encode_args({**SOURCE_VIDEO, **change}) is None
+
+
+def test_cut_between_keyframes_joins_a_matching_head(source_video, tmp_path):
+    # Keyframes every 2 s; 3.3 s needs a re-encoded head up to the one at 4 s
+    output = str(tmp_path / "cut.mp4")
+    _, start = ffmpeg_render.fast_cut(source_video, 3.3, 11.3, output)
+
+    assert start == 3.3
+
+    source, cut = media.probe(source_video), media.probe(output)
+    assert media.duration(output) == pytest.approx(8.0, abs=0.25)
+    assert media.codecs(output) == media.codecs(source_video)
+    source_video_stream = next(s for s in source["streams"] if s["codec_type"] == "video")
+    cut_video_stream = next(s for s in cut["streams"] if s["codec_type"] == "video")
+    for key in ("profile", "width", "height", "pix_fmt"):
+        assert cut_video_stream[key] == source_video_stream[key]
+
+
+def test_cut_snaps_back_to_keyframe_in_allowed_silence(source_video, tmp_path):
+    output = str(tmp_path / "cut.mp4")
+    _, start = ffmpeg_render.fast_cut(source_video, 4.5, 10.0, output, earliest_start=3.5)
+    assert start == pytest.approx(4.0, abs=0.05)
+    assert media.duration(output) == pytest.approx(6.0, abs=0.1)
@@ -0,0 +1,67 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobstore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return jobstore.JobStore(tmp_path / "jobs.sqlite3", ttl_seconds=3600)
+
+
+def _set_worker(store, job_id, worker):
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET worker = ? WHERE job_id = ?", (worker, job_id))
+
+
+def test_reopening_a_current_database_changes_nothing(store):
+    store.register("job", store.path.parent / "job", {}, "queued")
+    reopened = jobstore.JobStore(store.path, ttl_seconds=3600)
+    assert reopened.get("job")["status"] == "queued"
+
+
+def test_fail_orphaned_skips_jobs_whose_worker_is_alive(store, tmp_path):
+    store.register("live", tmp_path / "live", {}, "running")
+    store.register("dead", tmp_path / "dead", {}, "running")
+    store.register("recycled", tmp_path / "recycled", {}, "queued")
+    store.register("done", tmp_path / "done", {}, "done")
+    _set_worker(store, "dead", "999999999:")
+    # Our pid, but a different process start time: the pid was reused
+    _set_worker(store, "recycled", f"{os.getpid()}:0")
+    _set_worker(store, "done", "999999999:")
+
+    directories = store.fail_orphaned(("queued", "running"), "failed", "restarted")
+
+    assert sorted(directories) == [tmp_path / "dead", tmp_path / "recycled"]
+    assert store.get("live")["status"] == "running"
+    assert store.get("done")["status"] == "done"
+    for job_id in ("dead", "recycled"):
+        job = store.get(job_id)
+        assert (job["status"], job["error"]) == ("failed", "restarted")
+        assert job["finished"] is not None
+
+
+def test_fail_orphaned_releases_the_jobs_bytes(store, tmp_path):
+    store.register("dead", tmp_path / "dead", {}, "running")
+    store.add_clip("dead", {"file_name": "clip_1.mp4", "size_bytes": 40})
+    store.add_bytes("dead", 40)
+    _set_worker(store, "dead", "999999999:")
+
+    store.fail_orphaned(("running",), "failed", "restarted")
+
+    assert store.usage_bytes() == 0
+    assert store.get("dead")["clips"] == []
+
+
+def test_pop_expired_returns_only_jobs_past_their_ttl(store, tmp_path):
+    now = datetime.utcnow()
+    store.register("old", tmp_path / "old", {}, "done")
+    store.register("new", tmp_path / "new", {}, "done")
+    store.register("running", tmp_path / "running", {}, "running")
+    store.update("old", finished=now - timedelta(hours=2))
+    store.update("new", finished=now)
+
+    assert store.pop_expired(now) == [tmp_path / "old"]
+    assert store.job_ids() == {"new", "running"}
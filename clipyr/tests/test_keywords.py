@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+
+app = pytest.importorskip("app")
+stubs = pytest.importorskip("benchmarks.stubs")
+
+
+def _terms(matcher, text):
+    return [(text[start:end], term) for start, end, term in matcher.find_all(text.lower())]
+
+
+def test_overlapping_keywords_and_hooks_are_all_reported():
+    matcher = app.KeywordMatcher(["secret", "money"], [r"the secret"])
+    assert _terms(matcher, "The secret to money") == [
+        ("the secret", ("hook", "the secret")),
+        ("secret", ("keyword", "secret")),
+        ("money", ("keyword", "money")),
+    ]
+
+
+def test_terms_only_match_whole_words():
+    matcher = app.KeywordMatcher(["secret", "money"], [r"watch this"])
+    assert _terms(matcher, "secretive moneybags watch thistle") == []
+
+
+def test_hooks_keep_uppercase_classes_and_may_end_in_punctuation():
+    matcher = app.KeywordMatcher([], [r"\S+!"])
+    assert _terms(matcher, "and then WOW! it worked") == [("wow!", ("hook", r"\S+!"))]
+
+
+@pytest.fixture
+def keywords_file(tmp_path, monkeypatch):
+    path = tmp_path / "keywords.json"
+    monkeypatch.setenv("CLIPPER_KEYWORDS_FILE", str(path))
+    return path
+
+
+def _write(path, config, mtime):
+    path.write_text(json.dumps(config), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_keywords_file_is_reloaded_when_it_changes(keywords_file):
+    _write(keywords_file, {"viral_keywords": ["Rocket"], "hook_patterns": [r"\S+!"]}, 1000)
+    clipper = app.AIVideoClipper(**stubs.stub_models(), preload_models=False)
+
+    # Keywords are lowercased; hook regexes are kept exactly as written
+    assert clipper.viral_keywords == ["rocket"]
+    assert clipper.hook_patterns == [r"\S+!"]
+    assert _terms(clipper.matcher, "rocket launch, yes!") == [
+        ("rocket", ("keyword", "rocket")),
+        ("yes!", ("hook", r"\S+!")),
+    ]
+    assert clipper.reload_keywords() is False
+
+    _write(keywords_file, {"viral_keywords": ["launch"]}, 2000)
+    assert _terms(clipper.matcher, "rocket launch") == [("launch", ("keyword", "launch"))]
+
+
+def test_broken_keywords_file_keeps_the_current_matcher(keywords_file):
+    _write(keywords_file, {"viral_keywords": ["rocket"]}, 1000)
+    clipper = app.AIVideoClipper(**stubs.stub_models(), preload_models=False)
+
+    _write(keywords_file, {"hook_patterns": ["(unclosed"]}, 2000)
+    assert clipper.reload_keywords() is False
+    assert _terms(clipper.matcher, "rocket") == [("rocket", ("keyword", "rocket"))]
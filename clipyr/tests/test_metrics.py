@@ -0,0 +1,19 @@
+import pstats
+
+import metrics
+
+
+def _render(seconds: float) -> str:
+    return f"rendered {seconds}"
+
+
+def test_profiled_call_measures_and_dumps_stats(tmp_path):
+    profile_path = str(tmp_path / "render_1.pstats")
+
+    result, record = metrics.profiled_call(profile_path, _render, "render", 4.0, seconds=4.0)
+
+    assert result == "rendered 4.0"
+    assert record["stage"] == "render"
+    assert record["input_seconds"] == 4.0
+    functions = {name for _, _, name in pstats.Stats(profile_path).stats}
+    assert "_render" in functions
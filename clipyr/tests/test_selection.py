@@ -0,0 +1,96 @@
+import itertools
+import random
+
+import pytest
+
+app = pytest.importorskip("app")
+
+
+def _compatible(chosen, min_spacing):
+    ordered = sorted(chosen, key=lambda w: w["start"])
+    return all(a["end"] <= b["start"] - min_spacing for a, b in zip(ordered, ordered[1:]))
+
+
+def _brute_force_best(windows, k, min_spacing):
+    best = 0.0
+    for size in range(1, min(k, len(windows)) + 1):
+        for chosen in itertools.combinations(windows, size):
+            if _compatible(chosen, min_spacing):
+                best = max(best, sum(w["virality_score"] for w in chosen))
+    return best
+
+
+def _windows(rng, n):
+    windows = []
+    for _ in range(n):
+        start = rng.randrange(0, 120)
+        windows.append(
+            {
+                "start": float(start),
+                "end": float(start + rng.choice([15, 30, 45])),
+                "virality_score": round(rng.uniform(0, 10), 2),
+            }
+        )
+    return windows
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("k,min_spacing", [(1, 0.0), (3, 0.0), (3, 10.0), (5, 5.0)])
+def test_matches_brute_force(seed, k, min_spacing):
+    windows = _windows(random.Random(seed), 9)
+    chosen = app.select_moments(windows, k, min_spacing)
+
+    assert len(chosen) <= k
+    assert _compatible(chosen, min_spacing)
+    assert sum(w["virality_score"] for w in chosen) == pytest.approx(
+        _brute_force_best(windows, k, min_spacing)
+    )
+    scores = [w["virality_score"] for w in chosen]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_prefers_two_good_windows_over_one_overlapping_best():
+    windows = [
+        {"start": 0.0, "end": 30.0, "virality_score": 6.0},
+        {"start": 15.0, "end": 45.0, "virality_score": 9.0},
+        {"start": 30.0, "end": 60.0, "virality_score": 6.0},
+    ]
+    chosen = app.select_moments(windows, 2)
+    assert sorted(chosen, key=lambda w: w["start"]) == [windows[0], windows[2]]
+
+
+def test_touching_windows_need_the_spacing():
+    windows = [
+        {"start": 0.0, "end": 30.0, "virality_score": 5.0},
+        {"start": 30.0, "end": 60.0, "virality_score": 4.0},
+    ]
+    assert len(app.select_moments(windows, 2)) == 2
+    assert app.select_moments(windows, 2, min_spacing=1.0) == [windows[0]]
+
+
+def test_zero_scores_still_fill_every_slot():
+    windows = [
+        {"start": float(start), "end": float(start + 15), "virality_score": 0.0}
+        for start in range(0, 120, 5)
+    ]
+    chosen = app.select_moments(windows, 3, min_spacing=5.0)
+    assert len(chosen) == 3
+    assert _compatible(chosen, 5.0)
+
+
+def test_leftover_slots_go_to_the_best_remaining_windows():
+    windows = [
+        {"start": 0.0, "end": 30.0, "virality_score": 5.0},
+        {"start": 40.0, "end": 70.0, "virality_score": 0.0},
+        {"start": 80.0, "end": 110.0, "virality_score": 0.0},
+        {"start": 20.0, "end": 50.0, "virality_score": 0.0},
+    ]
+    chosen = app.select_moments(windows, 3)
+    assert sorted(chosen, key=lambda w: w["start"]) == [windows[0], windows[1], windows[2]]
+
+
+@pytest.mark.parametrize(
+    "windows,k", [([], 3), ([{"start": 0.0, "end": 1.0, "virality_score": 1.0}], 0)]
+)
+def test_nothing_to_choose(windows, k):
+    assert app.select_moments(windows, k) == []
@@ -0,0 +1,51 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+
+import slots
+
+
+def test_slots_are_exclusive_until_released(tmp_path):
+    pool = slots.SlotPool(tmp_path, 2)
+    first, second = pool.acquire(), pool.acquire()
+    assert pool.try_acquire() is None
+
+    pool.release(first)
+    third = pool.try_acquire()
+    assert third is not None
+    assert pool.try_acquire() is None
+    pool.release(second)
+    pool.release(third)
+
+
+def test_slot_held_by_dead_process_is_freed(tmp_path):
+    holder = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            textwrap.dedent(
+                f"""
+                import sys, time
+                sys.path.insert(0, {os.path.dirname(slots.__file__)!r})
+                import slots
+                slots.SlotPool({str(tmp_path)!r}, 1).acquire()
+                print("held", flush=True)
+                time.sleep(60)
+                """
+            ),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "held"
+        pool = slots.SlotPool(tmp_path, 1)
+        assert pool.try_acquire() is None
+    finally:
+        holder.send_signal(signal.SIGKILL)
+        holder.wait()
+    slot = pool.try_acquire()
+    assert slot is not None
+    pool.release(slot)
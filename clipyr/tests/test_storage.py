@@ -0,0 +1,101 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+import jobstore
+import storage
+
+
+@pytest.fixture
+def store(tmp_path):
+    return jobstore.JobStore(tmp_path / "jobs.sqlite3", ttl_seconds=3600)
+
+
+@pytest.fixture
+def root(tmp_path):
+    path = tmp_path / "clips"
+    path.mkdir()
+    return path
+
+
+def _job(store, root, job_id, size=0, status="running"):
+    directory = root / job_id
+    directory.mkdir()
+    store.register(job_id, directory, {}, status)
+    if size:
+        (directory / "clip_1.mp4").write_bytes(b"\0" * size)
+    return directory
+
+
+def _orphan(store, job_id):
+    # A pid no live process can have
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET worker = '999999999:' WHERE job_id = ?", (job_id,))
+
+
+def test_interrupted_job_is_failed_and_its_directory_deleted(store, root):
+    manager = storage.StorageManager(root, store, quota_bytes=0)
+    orphaned = _job(store, root, "orphaned", size=100)
+    live = _job(store, root, "live", size=50)
+    manager.record("orphaned", [orphaned / "clip_1.mp4"])
+    manager.record("live", [live / "clip_1.mp4"])
+    _orphan(store, "orphaned")
+
+    assert manager.fail_interrupted(("queued", "running"), "failed", "restarted") == 1
+
+    assert not orphaned.exists()
+    assert live.exists()
+    job = store.get("orphaned")
+    assert job["status"] == "failed"
+    assert job["error"] == "restarted"
+    assert store.usage_bytes() == 50
+
+
+def test_quota_evicts_least_recently_downloaded_finished_jobs(store, root):
+    manager = storage.StorageManager(root, store, quota_bytes=250)
+    for job_id in ("a", "b", "c"):
+        directory = _job(store, root, job_id, size=100, status="done")
+        store.update(job_id, finished=datetime.utcnow())
+        manager.record(job_id, [directory / "clip_1.mp4"])
+        time.sleep(0.01)
+    # "c" came in over quota and evicted "a", the oldest
+    assert store.job_ids() == {"b", "c"}
+    assert not (root / "a").exists()
+
+    store.touch("b")
+    manager.quota_bytes = 150
+    assert manager.enforce_quota() == 1
+    assert store.job_ids() == {"b"}
+    assert store.usage_bytes() == 100
+
+
+def test_quota_never_evicts_unfinished_jobs(store, root):
+    manager = storage.StorageManager(root, store, quota_bytes=50)
+    directory = _job(store, root, "running", size=100)
+    manager.record("running", [directory / "clip_1.mp4"])
+    assert store.job_ids() == {"running"}
+    assert store.usage_bytes() == 100
+
+
+def test_reclaim_orphans_deletes_only_old_unknown_directories(store, root):
+    manager = storage.StorageManager(root, store, quota_bytes=0, orphan_grace_seconds=60)
+    _job(store, root, "known")
+    stale, fresh = root / "stale", root / "fresh"
+    stale.mkdir()
+    fresh.mkdir()
+    (root / "jobs.sqlite3-like-file").write_bytes(b"")
+    old = time.time() - 120
+    os.utime(stale, (old, old))
+    os.utime(root / "known", (old, old))
+    with store._connect() as conn:
+        conn.execute("UPDATE storage_usage SET bytes = 12345")
+
+    assert manager.reclaim_orphans() == 1
+
+    assert not stale.exists()
+    assert fresh.exists()
+    assert (root / "known").exists()
+    # The usage counter is recounted from the job records
+    assert store.usage_bytes() == 0
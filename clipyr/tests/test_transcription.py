@@ -0,0 +1,73 @@
+import pytest
+
+import transcription
+
+
+def _segment(*words):
+    """Segment from ``(word, start, end)`` triples, text as Whisper spaces it."""
+    return {
+        "start": words[0][1],
+        "end": words[-1][2],
+        "text": "".join(f" {w}" for w, _, _ in words).strip(),
+        "words": [{"word": f" {w}", "start": s, "end": e} for w, s, e in words],
+    }
+
+
+def _words(segments):
+    return [word["word"].strip() for segment in segments for word in segment["words"]]
+
+
+def test_stitch_keeps_each_overlapping_word_once():
+    chunks = [(0.0, 10.0), (10.0, 20.0)]
+    # Both chunks heard 9-11 s; each cut the sentence into segments differently
+    first = [
+        _segment(("hello", 1.0, 1.5), ("there", 1.6, 2.0)),
+        _segment(("we", 8.0, 8.5), ("went", 8.6, 9.4), ("to", 9.5, 9.8),
+                 ("the", 9.9, 10.2), ("park", 10.3, 10.8)),
+    ]
+    second = [
+        _segment(("to", 9.5, 9.8), ("the", 9.9, 10.2), ("park", 10.3, 10.8),
+                 ("today", 11.0, 12.0)),
+        _segment(("bye", 15.0, 15.5)),
+    ]
+
+    segments = transcription.stitch_segments(chunks, [first, second])
+
+    assert _words(segments) == ["hello", "there", "we", "went", "to", "the", "park", "today", "bye"]
+    assert [s["text"] for s in segments] == [
+        "hello there", "we went to", "the park today", "bye",
+    ]
+    # Trimmed segments span only the words they kept, so none overlap
+    assert segments[1]["end"] == 9.8 and segments[2]["start"] == 9.9
+    for before, after in zip(segments, segments[1:]):
+        assert before["end"] <= after["start"]
+
+
+def no_words(start, end, text):
+    return {"start": start, "end": end, "text": text, "words": []}
+
+
+def test_stitch_without_word_timings_uses_segment_midpoints():
+    chunks = [(0.0, 10.0), (10.0, 20.0)]
+    first = [no_words(7.0, 9.5, "kept by first"), no_words(9.0, 11.5, "owned by second")]
+    second = [no_words(9.0, 11.5, "owned by second"), no_words(19.0, 21.0, "tail")]
+
+    segments = transcription.stitch_segments(chunks, [first, second])
+
+    assert [s["text"] for s in segments] == ["kept by first", "owned by second", "tail"]
+
+
+def test_single_chunk_is_left_untouched():
+    segment = _segment(("only", 0.0, 0.4), ("chunk", 0.5, 1.0))
+    assert transcription.stitch_segments([(0.0, 1.0)], [[segment]]) == [segment]
+
+
+def test_backend_must_implement_loading_and_transcription():
+    class Incomplete(transcription.TranscriptionBackend):
+        name = "incomplete"
+
+        def _load_model(self):
+            return object()
+
+    with pytest.raises(TypeError):
+        Incomplete("tiny")
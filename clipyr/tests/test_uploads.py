@@ -0,0 +1,154 @@
+import builtins
+import hashlib
+import os
+
+import pytest
+
+import uploads
+
+BLOCK = 1024
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(uploads, "CONTENT_HASH_BLOCK", BLOCK)
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Upload data files opened for reading."""
+    opened = []
+
+    def tracking_open(file, mode="r", *args, **kwargs):
+        if os.path.basename(str(file)) == "data" and "r" in mode:
+            opened.append(file)
+        return builtins.open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(uploads, "open", tracking_open, raising=False)
+    return opened
+
+
+def _reference_hash(data: bytes) -> str:
+    blocks = [data[i : i + BLOCK] for i in range(0, len(data), BLOCK)]
+    return hashlib.sha256(b"".join(hashlib.sha256(b).digest() for b in blocks)).hexdigest()
+
+
+def _upload(stores, chunks):
+    upload_id = stores[0].create("talk.mp4")["upload_id"]
+    offset = 0
+    for i, chunk in enumerate(chunks):
+        with stores[i % len(stores)].append(upload_id, offset) as writer:
+            writer.write(chunk)
+        offset = writer.offset
+    return upload_id
+
+
+@pytest.fixture
+def workers(tmp_path):
+    # Two stores on one directory stand in for two server workers
+    return uploads.UploadStore(tmp_path, 3600), uploads.UploadStore(tmp_path, 3600)
+
+
+def test_whole_block_chunks_alternating_between_workers_are_never_reread(workers, reads):
+    chunks = [os.urandom(size * BLOCK) for size in (3, 1, 5, 2)] + [os.urandom(100)]
+    upload_id = _upload(workers, chunks)
+    result = workers[1].complete(upload_id)
+
+    # Only completing reads back the 100-byte unfinished block
+    assert len(reads) == 1
+    assert result["content_hash"] == _reference_hash(b"".join(chunks))
+    path, digest = workers[0].resolve(upload_id)
+    assert path.read_bytes() == b"".join(chunks)
+    assert digest == result["content_hash"]
+
+
+def test_unaligned_chunks_reread_at_most_the_unfinished_block(workers, reads, monkeypatch):
+    read_sizes = []
+    open_for_reads = uploads.open
+
+    class CountingReader:
+        def __init__(self, handle):
+            self._handle = handle
+
+        def __getattr__(self, name):
+            return getattr(self._handle, name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._handle.close()
+
+        def read(self, size=-1):
+            data = self._handle.read(size)
+            read_sizes.append(len(data))
+            return data
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        handle = open_for_reads(file, mode, *args, **kwargs)
+        if os.path.basename(str(file)) == "data" and "r" in mode:
+            return CountingReader(handle)
+        return handle
+
+    monkeypatch.setattr(uploads, "open", counting_open, raising=False)
+    chunks = [os.urandom(size) for size in (700, 1, 2000, 64, 1500, 3)]
+    upload_id = _upload(workers, chunks)
+    result = workers[0].complete(upload_id)
+
+    assert result["content_hash"] == _reference_hash(b"".join(chunks))
+    assert max(read_sizes) < BLOCK
+    assert sum(read_sizes) < len(chunks) * BLOCK
+
+
+def test_lost_block_digests_are_rebuilt_once(workers, reads, tmp_path):
+    first = [os.urandom(4 * BLOCK)]
+    upload_id = _upload(workers, first)
+    # As if the process died before the digests reached the disk
+    blocks = tmp_path / "sessions" / upload_id / "blocks"
+    blocks.write_bytes(blocks.read_bytes()[:40])
+
+    with workers[1].append(upload_id, 4 * BLOCK) as writer:
+        writer.write(os.urandom(BLOCK))
+    assert len(reads) == 1
+    with workers[0].append(upload_id, 5 * BLOCK) as writer:
+        writer.write(os.urandom(BLOCK))
+    assert len(reads) == 1
+
+    data = (tmp_path / "sessions" / upload_id / "data").read_bytes()
+    assert workers[1].complete(upload_id)["content_hash"] == _reference_hash(data)
+
+
+def test_digests_ahead_of_the_data_are_dropped(workers, tmp_path):
+    upload_id = _upload(workers, [os.urandom(BLOCK + 10)])
+    with open(tmp_path / "sessions" / upload_id / "blocks", "ab") as blocks:
+        blocks.write(os.urandom(32))
+
+    with workers[1].append(upload_id, BLOCK + 10) as writer:
+        writer.write(os.urandom(BLOCK))
+    data = (tmp_path / "sessions" / upload_id / "data").read_bytes()
+    assert workers[0].complete(upload_id)["content_hash"] == _reference_hash(data)
+
+
+@pytest.mark.parametrize("size", [0, 1, BLOCK, 3 * BLOCK + 7])
+def test_content_hash_of_a_file_matches_the_streamed_hash(tmp_path, size):
+    data = os.urandom(size)
+    path = tmp_path / "video.mp4"
+    path.write_bytes(data)
+    hasher = uploads.ContentHasher()
+    for i in range(0, size, 300):
+        hasher.update(data[i : i + 300])
+
+    assert uploads.content_hash(path) == hasher.hexdigest() == _reference_hash(data)
+
+
+def test_duplicate_upload_reuses_the_stored_file(tmp_path):
+    store = uploads.UploadStore(tmp_path, 3600)
+    ids = []
+    for _ in range(2):
+        upload_id = store.create("talk.mp4")["upload_id"]
+        with store.append(upload_id, 0) as writer:
+            writer.write(b"same bytes")
+        ids.append(upload_id)
+    assert store.complete(ids[0])["duplicate"] is False
+    assert store.complete(ids[1])["duplicate"] is True
+    assert store.resolve(ids[0])[0] == store.resolve(ids[1])[0]
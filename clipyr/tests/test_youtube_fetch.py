@@ -0,0 +1,134 @@
+"""Ranged YouTube fetches, run against a local HTTP stand-in for the video host.
+
+yt-dlp's generic extractor treats a direct MP4 URL like any other video page,
+so the stand-in only has to serve one file, with or without Range support.
+"""
+
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import media
+
+app = pytest.importorskip("app")
+yt_dlp = pytest.importorskip("yt_dlp")
+stubs = pytest.importorskip("benchmarks.stubs")
+
+_RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class _VideoHost(BaseHTTPRequestHandler):
+    path_on_disk = ""
+    ranges = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, body: bool) -> None:
+        size = os.path.getsize(self.path_on_disk)
+        start, end = 0, size - 1
+        match = _RANGE_RE.match(self.headers.get("Range", "")) if self.ranges else None
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        if self.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if body:
+            with open(self.path_on_disk, "rb") as handle:
+                handle.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    block = handle.read(min(remaining, 64 * 1024))
+                    if not block:
+                        break
+                    try:
+                        self.wfile.write(block)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    remaining -= len(block)
+
+    def do_HEAD(self) -> None:
+        self._send(body=False)
+
+    def do_GET(self) -> None:
+        self._send(body=True)
+
+
+@pytest.fixture(params=[True, False], ids=["ranges", "no-ranges"])
+def video_url(request, source_video):
+    handler = type("Host", (_VideoHost,), {"path_on_disk": source_video, "ranges": request.param})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/talk.mp4"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clipper():
+    return app.AIVideoClipper(**stubs.stub_models(), preload_models=False)
+
+
+def test_audio_phase_downloads_the_source_audio(clipper, video_url, tmp_path):
+    path = clipper.download_youtube_audio(video_url, str(tmp_path))
+    assert os.path.basename(path).startswith("source_audio.")
+    assert "aac" in media.codecs(path)
+
+
+def test_range_phase_fetches_only_the_padded_range(clipper, video_url, tmp_path):
+    path, offset = clipper.download_youtube_range(video_url, 10.0, 14.0, str(tmp_path), "range_1")
+    assert offset == pytest.approx(10.0 - app.YOUTUBE_RANGE_PADDING_SECONDS)
+    expected = 14.0 - 10.0 + 2 * app.YOUTUBE_RANGE_PADDING_SECONDS
+    assert media.duration(path) == pytest.approx(expected, abs=0.5)
+
+
+def test_failed_range_download_falls_back_to_full_video(clipper, video_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "YOUTUBE_FETCH_MODE", "ranged")
+    monkeypatch.setattr(app.AIVideoClipper, "is_valid_youtube_url", staticmethod(lambda url: True))
+
+    attempts = []
+    full_downloads = []
+    download_video = clipper.download_youtube_video
+
+    def flaky_range(*args, **kwargs):
+        attempts.append(args)
+        raise yt_dlp.utils.DownloadError("range requests are not supported")
+
+    def counted_video(*args, **kwargs):
+        full_downloads.append(args)
+        return download_video(*args, **kwargs)
+
+    monkeypatch.setattr(clipper, "download_youtube_range", flaky_range)
+    monkeypatch.setattr(clipper, "download_youtube_video", counted_video)
+
+    _, clips, metadata = app.generate_clips(
+        clipper=clipper,
+        input_type="YouTube URL",
+        uploaded_path=None,
+        youtube_url=video_url,
+        clip_duration=15,
+        num_clips=2,
+        add_subtitles=False,
+        output_dir=str(tmp_path / "clips"),
+        output_mode="fast",
+    )
+
+    # One failed range switches the job to the full video, which later clips reuse
+    assert metadata["source"] == "youtube"
+    assert len(attempts) == 1
+    assert len(full_downloads) == 1
+    assert clips
+    for clip in clips:
+        clip_path = str(tmp_path / "clips" / clip["file_name"])
+        assert media.duration(clip_path) == pytest.approx(clip["duration"], abs=2.5)
@@ -0,0 +1,286 @@
+"""Transcription backends, and chunked parallel transcription for long inputs.
+
+A backend turns a 16 kHz mono waveform into segments shaped like
+``{"start", "end", "text", "words": [{"word", "start", "end", "probability"}]}``,
+whichever engine produced them:
+
+- ``whisper``: openai-whisper on PyTorch (the default).
+- ``faster-whisper``: the CTranslate2 port, with int8 weights and the Silero
+  VAD filter. It is an optional dependency (commented out in
+  ``requirements.txt``; the Docker image installs it with
+  ``--build-arg INSTALL_FASTER_WHISPER=1``) and is imported only when selected.
+
+The decoded waveform is split at low-energy points into chunks of roughly
+``min_chunk``-``max_chunk`` seconds. The chunks are transcribed in a process
+pool and the segments are stitched back together on the source timeline, in
+the same shape ``AIVideoClipper.transcribe_video`` returns.
+
+Workers are started with the ``spawn`` method and load their own copy of the
+model. Forking a parent whose torch thread pool is already running is not
+safe.
+"""
+
+import abc
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Type
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Energy is measured on half-second frames when looking for a quiet cut point
+ENERGY_FRAME_SECONDS = 0.5
+# Audio shared by neighbouring chunks, so words at a cut are heard in full
+CHUNK_OVERLAP_SECONDS = 1.0
+
+_worker_backend = None
+
+
+class TranscriptionBackend(abc.ABC):
+    """Loads a speech-to-text model on first use and transcribes waveforms with it."""
+
+    name = ""
+
+    def __init__(self, model_name: str, threads: int = 0) -> None:
+        self.model_name = model_name
+        # 0 leaves the engine's own default
+        self.threads = threads
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the engine and model whose output lands in the analysis cache."""
+        return f"{self.name}-{self.model_name}"
+
+    def load(self) -> None:
+        with self._load_lock:
+            if self._model is None:
+                self._model = self._load_model()
+
+    @abc.abstractmethod
+    def _load_model(self):
+        """Load and return the engine's model; called once, under the load lock."""
+
+    @abc.abstractmethod
+    def transcribe(self, audio: np.ndarray) -> List[Dict]:
+        """Segments of ``audio`` (16 kHz mono float32), on its own timeline."""
+
+
+class WhisperBackend(TranscriptionBackend):
+    name = "whisper"
+
+    def __init__(self, model_name: str, threads: int = 0, model=None) -> None:
+        super().__init__(model_name, threads)
+        # An already loaded model (or a stand-in with the same ``transcribe``)
+        self._model = model
+
+    def _load_model(self):
+        import whisper
+
+        return whisper.load_model(self.model_name)
+
+    def transcribe(self, audio: np.ndarray) -> List[Dict]:
+        self.load()
+        result = self._model.transcribe(audio, word_timestamps=True)
+        return [
+            {
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"].strip(),
+                "words": segment.get("words", []),
+            }
+            for segment in result.get("segments", [])
+        ]
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str, threads: int = 0, compute_type: str = "int8") -> None:
+        super().__init__(model_name, threads)
+        self.compute_type = compute_type
+
+    @property
+    def fingerprint(self) -> str:
+        return f"{self.name}-{self.model_name}-{self.compute_type}"
+
+    def _load_model(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as exc:
+            raise RuntimeError(
+                "The faster-whisper transcription backend needs `pip install faster-whisper==1.0.3`"
+            ) from exc
+        return WhisperModel(
+            self.model_name, device="cpu", compute_type=self.compute_type, cpu_threads=self.threads
+        )
+
+    def transcribe(self, audio: np.ndarray) -> List[Dict]:
+        self.load()
+        # Segments come back as a generator; decoding happens while iterating
+        segments, _ = self._model.transcribe(audio, word_timestamps=True, vad_filter=True)
+        return [
+            {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip(),
+                "words": [
+                    {
+                        "word": word.word,
+                        "start": word.start,
+                        "end": word.end,
+                        "probability": word.probability,
+                    }
+                    for word in segment.words or []
+                ],
+            }
+            for segment in segments
+        ]
+
+
+BACKENDS: Dict[str, Type[TranscriptionBackend]] = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def create_backend(name: str, model_name: str, threads: int = 0) -> TranscriptionBackend:
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown transcription backend {name!r}; choose from {', '.join(BACKENDS)}"
+        ) from None
+    return backend(model_name, threads)
+
+
+def plan_chunks(
+    audio: np.ndarray,
+    min_chunk: float = 300.0,
+    max_chunk: float = 600.0,
+    sr: int = SAMPLE_RATE,
+) -> List[Tuple[float, float]]:
+    """Split points for ``audio``: each cut lands on the quietest frame in its search range."""
+    total = len(audio) / sr
+    frame = int(ENERGY_FRAME_SECONDS * sr)
+    n_frames = len(audio) // frame
+    energy = np.square(audio[: n_frames * frame].reshape(n_frames, frame), dtype=np.float32)
+    energy = energy.mean(axis=1)
+
+    chunks: List[Tuple[float, float]] = []
+    start = 0.0
+    while total - start > max_chunk:
+        lo = int((start + min_chunk) / ENERGY_FRAME_SECONDS)
+        hi = min(int((start + max_chunk) / ENERGY_FRAME_SECONDS), n_frames)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cut = (quietest + 0.5) * ENERGY_FRAME_SECONDS
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, total))
+    return chunks
+
+
+def _shift_segment(segment: Dict, offset: float) -> Dict:
+    return {
+        "start": segment["start"] + offset,
+        "end": segment["end"] + offset,
+        "text": segment["text"].strip(),
+        "words": [
+            {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+            for word in segment.get("words", [])
+        ],
+    }
+
+
+def _init_worker(backend_name: str, model_name: str, threads: int) -> None:
+    global _worker_backend
+    import torch
+
+    torch.set_num_threads(threads)
+    _worker_backend = create_backend(backend_name, model_name, threads)
+    _worker_backend.load()
+
+
+def _transcribe_chunk(audio: np.ndarray, offset: float) -> List[Dict]:
+    return [_shift_segment(segment, offset) for segment in _worker_backend.transcribe(audio)]
+
+
+def transcribe_chunked(
+    audio: np.ndarray,
+    backend_name: str,
+    model_name: str,
+    workers: int,
+    threads_per_worker: int = 1,
+    min_chunk: float = 300.0,
+    max_chunk: float = 600.0,
+    sr: int = SAMPLE_RATE,
+) -> List[Dict]:
+    """Transcribe ``audio`` chunk by chunk on ``workers`` processes and stitch the result.
+
+    Each chunk is decoded with ``CHUNK_OVERLAP_SECONDS`` of context on both
+    sides; ``stitch_segments`` drops what the overlap produced twice.
+    """
+    chunks = plan_chunks(audio, min_chunk, max_chunk, sr)
+    print(f"Transcribing {len(chunks)} chunks on {workers} workers...")
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(backend_name, model_name, threads_per_worker),
+    ) as pool:
+        futures = []
+        for start, end in chunks:
+            padded_start = max(0.0, start - CHUNK_OVERLAP_SECONDS)
+            padded_end = end + CHUNK_OVERLAP_SECONDS
+            piece = audio[int(padded_start * sr) : int(padded_end * sr)]
+            futures.append(pool.submit(_transcribe_chunk, piece, padded_start))
+        results = [future.result() for future in futures]
+    return stitch_segments(chunks, results)
+
+
+def _trim_segment(segment: Dict, owns) -> Dict | None:
+    """The part of ``segment`` whose words ``owns`` accepts, or None if there is none."""
+    words = segment.get("words") or []
+    if not words:
+        return segment if owns((segment["start"] + segment["end"]) / 2) else None
+    kept = [word for word in words if owns((word["start"] + word["end"]) / 2)]
+    if not kept:
+        return None
+    if len(kept) == len(words):
+        return segment
+    return {
+        **segment,
+        "start": segment["start"] if kept[0] is words[0] else kept[0]["start"],
+        "end": segment["end"] if kept[-1] is words[-1] else kept[-1]["end"],
+        "text": "".join(word["word"] for word in kept).strip(),
+        "words": kept,
+    }
+
+
+def stitch_segments(
+    chunks: List[Tuple[float, float]], results: List[List[Dict]]
+) -> List[Dict]:
+    """Merge per-chunk segments (already on the source timeline) into one transcript.
+
+    Each chunk owns the span between its cut points, and a word is kept by the
+    chunk that owns its midpoint. A segment that crosses a cut is trimmed to
+    its owned words, so the words both neighbours heard in the overlap appear
+    once. Segments without word timings fall back to their own midpoint.
+    """
+    segments: List[Dict] = []
+    for index, ((start, end), chunk_segments) in enumerate(zip(chunks, results)):
+        first, last = index == 0, index == len(chunks) - 1
+
+        def owns(t: float, start=start, end=end, first=first, last=last) -> bool:
+            return (first or t >= start) and (last or t < end)
+
+        for segment in chunk_segments:
+            trimmed = _trim_segment(segment, owns)
+            if trimmed is not None:
+                segments.append(trimmed)
+    segments.sort(key=lambda segment: segment["start"])
+    return segments
@@ -0,0 +1,301 @@
+"""Resumable chunked uploads, hashed as they arrive.
+
+A client creates a session, appends the file in chunks with PUTs at explicit
+offsets (resuming from the offset the server reports after a dropped
+connection), then completes it. Completed files are stored once per content
+hash: a duplicate upload is discarded and the stored copy reused.
+
+The content hash is the SHA-256 of the SHA-256 digests of consecutive 4 MiB
+blocks (the scheme Dropbox's ``content_hash`` uses). Unlike a plain SHA-256,
+its running state is plain data: the digests of the finished blocks, kept in
+a ``blocks`` file next to the partial data, plus whatever part of the last
+block has arrived. Any worker can take the next chunk. It reads back at most
+the unfinished block (nothing when chunks are whole blocks), and completing
+an upload needs no second pass over the file. Digests missing after a crash
+are rebuilt once from the data and saved.
+
+Layout under ``root``::
+
+    sessions/<upload_id>/state.json   filename, declared size, result once complete
+    sessions/<upload_id>/data         the bytes received so far
+    sessions/<upload_id>/blocks       digests of the data's finished blocks
+    blobs/<content_hash>/<filename>   completed, deduplicated files
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Tuple
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+# Block size of the content hash; part of its definition, so changing it changes every hash
+CONTENT_HASH_BLOCK = 4 * 1024 * 1024
+_DIGEST_SIZE = 32
+
+
+class UploadNotFound(KeyError):
+    pass
+
+
+class UploadConflict(ValueError):
+    """The request doesn't fit the session's state; ``offset`` is where it stands."""
+
+    def __init__(self, message: str, offset: int) -> None:
+        super().__init__(message)
+        self.offset = offset
+
+
+class ContentHasher:
+    """Streaming content hash over ``CONTENT_HASH_BLOCK``-sized blocks.
+
+    ``block_digests`` and ``pending`` resume a hash: the digests of the
+    finished blocks and the bytes of the unfinished one.
+    """
+
+    def __init__(self, block_digests: bytes = b"", pending: bytes = b"") -> None:
+        self.block_digests = bytearray(block_digests)
+        self._block = hashlib.sha256()
+        self._block_size = 0
+        self.update(pending)
+
+    def update(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            take = min(len(view), CONTENT_HASH_BLOCK - self._block_size)
+            self._block.update(view[:take])
+            self._block_size += take
+            view = view[take:]
+            if self._block_size == CONTENT_HASH_BLOCK:
+                self.block_digests += self._block.digest()
+                self._block = hashlib.sha256()
+                self._block_size = 0
+
+    def hexdigest(self) -> str:
+        digests = bytes(self.block_digests)
+        if self._block_size:
+            digests += self._block.digest()
+        return hashlib.sha256(digests).hexdigest()
+
+
+def content_hash(path: str | Path) -> str:
+    hasher = ContentHasher()
+    with open(path, "rb") as handle:
+        while block := handle.read(CONTENT_HASH_BLOCK):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _safe_name(filename: str | None) -> str:
+    name = os.path.basename(filename or "") or "upload.mp4"
+    return re.sub(r"[^\w.\- ]", "_", name)
+
+
+class _ChunkWriter:
+    def __init__(
+        self, handle: BinaryIO, blocks: BinaryIO, hasher: ContentHasher, limit: int | None
+    ) -> None:
+        self._handle = handle
+        self._blocks = blocks
+        self._hasher = hasher
+        self._saved = len(hasher.block_digests)
+        self._limit = limit
+        self.offset = handle.tell()
+
+    def write(self, chunk: bytes) -> None:
+        if self._limit is not None and self.offset + len(chunk) > self._limit:
+            raise UploadConflict("More bytes than the declared size", self.offset)
+        self._handle.write(chunk)
+        self._hasher.update(chunk)
+        self.offset += len(chunk)
+        if len(self._hasher.block_digests) > self._saved:
+            self._blocks.write(self._hasher.block_digests[self._saved :])
+            self._saved = len(self._hasher.block_digests)
+
+
+class UploadStore:
+    def __init__(self, root: Path, ttl_seconds: int) -> None:
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.sessions = self.root / "sessions"
+        self.blobs = self.root / "blobs"
+        self.sessions.mkdir(parents=True, exist_ok=True)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+
+    def _session_dir(self, upload_id: str) -> Path:
+        if not _UPLOAD_ID_RE.match(upload_id):
+            raise UploadNotFound(upload_id)
+        directory = self.sessions / upload_id
+        if not (directory / "state.json").exists():
+            raise UploadNotFound(upload_id)
+        return directory
+
+    @staticmethod
+    def _read_state(directory: Path) -> Dict:
+        with open(directory / "state.json", "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    @staticmethod
+    def _write_state(directory: Path, state: Dict) -> None:
+        temp = directory / "state.json.tmp"
+        with open(temp, "w", encoding="utf-8") as handle:
+            json.dump(state, handle)
+        os.replace(temp, directory / "state.json")
+
+    @contextmanager
+    def _locked(self, directory: Path) -> Iterator[None]:
+        # One writer per session across threads and worker processes. A second
+        # request is refused rather than made to wait, which would block the
+        # event loop it runs on.
+        with open(directory / "lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflict(
+                    "Another request is writing to this upload",
+                    self.status(directory.name)["offset"],
+                ) from None
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def create(self, filename: str | None, size: int | None = None) -> Dict:
+        upload_id = uuid.uuid4().hex
+        directory = self.sessions / upload_id
+        directory.mkdir(parents=True)
+        (directory / "data").touch()
+        (directory / "blocks").touch()
+        state = {"filename": _safe_name(filename), "size": size, "created": time.time()}
+        self._write_state(directory, state)
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict:
+        directory = self._session_dir(upload_id)
+        state = self._read_state(directory)
+        completed = "content_hash" in state
+        return {
+            "upload_id": upload_id,
+            "filename": state["filename"],
+            "size": state["size"],
+            "offset": state["size_received"] if completed else (directory / "data").stat().st_size,
+            "completed": completed,
+            "content_hash": state.get("content_hash"),
+        }
+
+    @staticmethod
+    def _resume_hasher(directory: Path, size: int) -> ContentHasher:
+        """Hasher over the first ``size`` bytes of the data, from the saved block digests.
+
+        Only the unfinished block is read back, plus any finished block whose
+        digest was lost (e.g. in a crash); those digests are saved again.
+        """
+        finished = size // CONTENT_HASH_BLOCK
+        with open(directory / "blocks", "a+b") as blocks:
+            blocks.seek(0)
+            digests = blocks.read(finished * _DIGEST_SIZE)
+            saved = len(digests) // _DIGEST_SIZE
+            # Drops digests of blocks whose data never reached the file
+            blocks.truncate(saved * _DIGEST_SIZE)
+            hasher = ContentHasher(digests[: saved * _DIGEST_SIZE])
+            if saved == finished and size % CONTENT_HASH_BLOCK == 0:
+                return hasher
+            with open(directory / "data", "rb") as data:
+                data.seek(saved * CONTENT_HASH_BLOCK)
+                for _ in range(saved, finished):
+                    hasher.update(data.read(CONTENT_HASH_BLOCK))
+                hasher.update(data.read(size - finished * CONTENT_HASH_BLOCK))
+            blocks.write(hasher.block_digests[saved * _DIGEST_SIZE :])
+        return hasher
+
+    @contextmanager
+    def append(self, upload_id: str, offset: int) -> Iterator[_ChunkWriter]:
+        """Writer for bytes starting at ``offset``, which must be the current end of the data.
+
+        Raises ``UploadConflict`` for any other offset, once the upload is complete,
+        or when a write would run past the declared size.
+        """
+        directory = self._session_dir(upload_id)
+        data_path = directory / "data"
+        with self._locked(directory):
+            state = self._read_state(directory)
+            if "content_hash" in state:
+                raise UploadConflict("Upload is already complete", state["size_received"])
+            current = data_path.stat().st_size
+            if offset != current:
+                raise UploadConflict(f"Expected offset {current}", current)
+
+            hasher = self._resume_hasher(directory, current)
+            # The data goes out before the digests of its blocks; a digest
+            # without its data is ignored when the upload is resumed
+            with open(data_path, "ab") as handle, open(directory / "blocks", "ab") as blocks:
+                writer = _ChunkWriter(handle, blocks, hasher, state["size"])
+                try:
+                    yield writer
+                finally:
+                    handle.flush()
+
+    def complete(self, upload_id: str) -> Dict:
+        """Finish an upload and store it under its hash; returns its status plus ``duplicate``."""
+        directory = self._session_dir(upload_id)
+        data_path = directory / "data"
+        with self._locked(directory):
+            state = self._read_state(directory)
+            if "content_hash" in state:
+                return {**self.status(upload_id), "duplicate": state["duplicate"]}
+            received = data_path.stat().st_size
+            if state["size"] is not None and received != state["size"]:
+                raise UploadConflict(f"Received {received} of {state['size']} bytes", received)
+
+            digest = self._resume_hasher(directory, received).hexdigest()
+            blob_dir = self.blobs / digest
+            existing = self._blob_path(digest)
+            duplicate = existing is not None
+            if duplicate:
+                data_path.unlink()
+                os.utime(existing)
+            else:
+                blob_dir.mkdir(parents=True, exist_ok=True)
+                os.replace(data_path, blob_dir / state["filename"])
+            (directory / "blocks").unlink()
+            state.update(content_hash=digest, size_received=received, duplicate=duplicate)
+            self._write_state(directory, state)
+        return {**self.status(upload_id), "duplicate": duplicate}
+
+    def _blob_path(self, digest: str) -> Path | None:
+        blob_dir = self.blobs / digest
+        if not blob_dir.is_dir():
+            return None
+        files = [path for path in blob_dir.iterdir() if path.is_file()]
+        return files[0] if files else None
+
+    def resolve(self, upload_id: str) -> Tuple[Path, str]:
+        """Path and content hash of a completed upload; marks the stored file as recently used."""
+        state = self._read_state(self._session_dir(upload_id))
+        if "content_hash" not in state:
+            raise UploadConflict("Upload is not complete", self.status(upload_id)["offset"])
+        path = self._blob_path(state["content_hash"])
+        if path is None:
+            raise UploadNotFound(upload_id)
+        os.utime(path)
+        return path, state["content_hash"]
+
+    def cleanup(self) -> None:
+        """Delete sessions and stored files untouched for longer than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for parent in (self.sessions, self.blobs):
+            for entry in parent.iterdir():
+                try:
+                    newest = max(
+                        [entry.stat().st_mtime] + [p.stat().st_mtime for p in entry.iterdir()]
+                    )
+                except OSError:
+                    continue
+                if newest < cutoff:
+                    shutil.rmtree(entry, ignore_errors=True)
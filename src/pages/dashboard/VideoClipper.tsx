@@ -21,12 +21,43 @@ interface VideoMetadata {
 
 interface ProcessResponse {
   job_id: string
-  status_message: string
+  status: JobStatus
+  status_url: string
+}
+
+type JobStatus = 'queued' | 'running' | 'done' | 'failed'
+
+interface JobResponse {
+  job_id: string
+  status: JobStatus
+  stage: string | null
+  status_message: string | null
+  error: string | null
   metadata: VideoMetadata
   clips: ClipSummary[]
   expires_in_seconds: number
 }
 
+const POLL_INTERVAL_MS = 2000
+
+function stageLabel(job: Pick<JobResponse, 'status' | 'stage'>): string {
+  if (job.status === 'queued') return 'Waiting for a free worker...'
+  switch (job.stage) {
+    case 'download':
+      return 'Downloading video...'
+    case 'audio':
+      return 'Analyzing audio...'
+    case 'transcribe':
+      return 'Transcribing speech...'
+    case 'score':
+      return 'Finding the best moments...'
+    default:
+      return job.stage?.startsWith('render') ? `Rendering ${job.stage.slice('render '.length)}...` : 'Processing...'
+  }
+}
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
 const INPUT_LABEL_UPLOAD = 'Upload Video File'
 const INPUT_LABEL_YOUTUBE = 'YouTube URL'
 
@@ -101,15 +132,35 @@ export default function VideoClipper() {
         detail?: string
       }
 
-      if (!response.ok) {
+      if (!response.ok || !payload.status_url) {
         throw new Error(payload?.detail || 'Failed to generate clips. Please try again.')
       }
 
-      setStatusMessage(payload.status_message || 'Clips generated successfully.')
-      setClips(payload.clips || [])
-      setMetadata(payload.metadata || null)
       setJobId(payload.job_id || null)
-      setExpiresIn(payload.expires_in_seconds ?? null)
+      setStatusMessage('Waiting for a free worker...')
+
+      let job: Partial<JobResponse> & { detail?: string } = {}
+      for (;;) {
+        await sleep(POLL_INTERVAL_MS)
+        const jobResponse = await fetch(payload.status_url)
+        job = (await jobResponse.json().catch(() => ({}))) as typeof job
+        if (!jobResponse.ok) {
+          throw new Error(job?.detail || 'Lost track of the clip job. Please try again.')
+        }
+        if (job.status === 'done' || job.status === 'failed') break
+        if (job.status) setStatusMessage(stageLabel(job as JobResponse))
+        // Clips are published one by one while the rest are still rendering
+        if (job.clips?.length) setClips(job.clips)
+      }
+
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Failed to generate clips. Please try again.')
+      }
+
+      setStatusMessage(job.status_message || 'Clips generated successfully.')
+      setClips(job.clips || [])
+      setMetadata(job.metadata || null)
+      setExpiresIn(job.expires_in_seconds ?? null)
     } catch (error) {
       resetOutputs()
       setErrorMessage(error instanceof Error ? error.message : 'Unexpected error')